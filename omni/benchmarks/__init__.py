@@ -1,11 +1,40 @@
-from omni.benchmarks.runner import BenchmarkRunner
+from omni.benchmarks.results import ResultStore, ResultIndex, SampleStore
+from omni.benchmarks.runner import BenchmarkRunner, JobRunner
+from omni.benchmarks.server import InferenceServer
+from omni.benchmarks.executor import (
+    JobExecutor,
+    SequentialJobExecutor,
+    SlurmJobExecutor,
+    PackedJobExecutor,
+    LocalJobExecutor,
+)
+from omni.benchmarks.history import JobHistory
+from omni.benchmarks.cache import ResultCache
+from omni.benchmarks.pool import SamplePool
+from omni.benchmarks.images import ImageManifest
+from omni.benchmarks.staging import NodeCache
 from omni.benchmarks.big_code_bench import BigCodeBenchRunner
 from omni.benchmarks.llm_evaluation_harness import LlmEvaluationHarnessRunner
 from omni.benchmarks.big_code_evaluation_harness import BigCodeEvaluationHarnessRunner
 from omni.benchmarks.ruler import RulerRunner
 
 __all__ = [
+    "ResultStore",
+    "ResultIndex",
+    "SampleStore",
     "BenchmarkRunner",
+    "JobRunner",
+    "InferenceServer",
+    "JobExecutor",
+    "SequentialJobExecutor",
+    "SlurmJobExecutor",
+    "PackedJobExecutor",
+    "LocalJobExecutor",
+    "JobHistory",
+    "ResultCache",
+    "SamplePool",
+    "ImageManifest",
+    "NodeCache",
     "BigCodeBenchRunner",
     "LlmEvaluationHarnessRunner",
     "BigCodeEvaluationHarnessRunner",
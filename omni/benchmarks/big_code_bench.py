@@ -1,13 +1,40 @@
+import hashlib
 import json
 from pathlib import Path
-from typing import List, Literal, Union
+import shlex
 import typer
-from omni.benchmarks import BenchmarkRunner
+from omni.benchmarks import BenchmarkRunner, SamplePool
 import inquirer
 import ast
 from omni.utils.enums import Benchmark, Task
 from rich import print
 from omni.utils.schemas import ContainerBind, SlurmConfig, RunConfig, BenchmarkConfig
+from omni.utils.functions import has_chat_template
+from typing import Any, List, Union
+
+
+# Computes the pass@k of the hard subset from the per-task outcomes of an evaluation of the full subset
+HARD_PASS_AT_K_SCRIPT = """
+import json, sys
+import numpy as np
+from bigcodebench.data import get_bigcodebench
+from bigcodebench.eval import estimate_pass_at_k
+
+hard = get_bigcodebench(subset="hard")
+with open(sys.argv[1]) as f:
+    outcomes = [o for task_id, o in json.load(f)["eval"].items() if task_id in hard]
+total = np.array([len(o) for o in outcomes])
+correct = np.array([sum(r["status"] == "pass" for r in o) for o in outcomes])
+if not len(total):
+    print(f"No hard task found in {sys.argv[1]}, the hard subset is not scored", file=sys.stderr)
+pass_at_k = {
+    f"pass@{k}": float(estimate_pass_at_k(total, correct, k).mean())
+    for k in [1, 5, 10, 25, 100]
+    if len(total) and total.min() >= k
+}
+with open(sys.argv[2], "w") as f:
+    json.dump(pass_at_k, f, indent=2)
+"""
 
 
 class BigCodeBenchRunner(BenchmarkRunner):
@@ -51,114 +78,367 @@ class BigCodeBenchRunner(BenchmarkRunner):
                 "No parameters provided. Please provide the parameters in the correct format."
             )
 
-        self.parameters = ast.literal_eval(response["parameters"])
+        self.parameters = self.collapse_greedy(ast.literal_eval(response["parameters"]))
+
+    def get_generate_command(
+        self,
+        model: str,
+        task: Task,
+        split: str,
+        backend: str,
+        temperature: Any,
+        n_samples: Any,
+        base_url: str = "",
+    ) -> str:
+        """
+        Get the bigcodebench.generate command of a sampling configuration.
+        """
+
+        command = (
+            "bigcodebench.generate "
+            f"--model {model} "
+            f"--temperature {temperature} "
+            f"--n_samples {n_samples} "
+            f"--split {split} "
+            "--subset full "
+            f"--backend {backend} "
+            f"--root /results/temp/{self.run_id}/{task}_{temperature}_{n_samples} "
+        )
+
+        if base_url:
+            command += f"--base_url {base_url} "
+        else:
+            command += f"--tp {self.run_config.tensor_parallel_size} "
+
+        return command
+
+    def get_samples_path(
+        self,
+        model: str,
+        task: Task,
+        split: str,
+        backend: str,
+        temperature: Any,
+        n_samples: Any,
+    ) -> str:
+        """
+        Get the samples file written by bigcodebench.generate for a sampling configuration, relative to the run directory.
+        """
+
+        return (
+            f"results/temp/{self.run_id}/{task}_{temperature}_{n_samples}/"
+            f"{model.replace('/', '--')}--main--bigcodebench-{split}--{backend}-{temperature}-{n_samples}-sanitized_calibrated.jsonl"
+        )
+
+    def get_pool_generate_command(
+        self,
+        model: str,
+        task: Task,
+        split: str,
+        backend: str,
+        temperature: Any,
+        n_samples: Any,
+        pool: str,
+        base_url: str = "",
+    ) -> str:
+        """
+        Get the command generating the samples of a sampling configuration missing from its sample pool.
+        The samples of the pool are written first, bigcodebench.generate resumes from them, then the new ones are added to the pool.
+        """
+
+        samples = self.get_samples_path(
+            model, task, split, backend, temperature, n_samples
+        )
+
+        return (
+            f"uv run omni take-samples {pool} {n_samples} {samples} && "
+            + self.command_wrapper(
+                self.get_generate_command(
+                    model, task, split, backend, temperature, n_samples, base_url
+                ),
+                container=True,
+                # The other backends query a server loading the model
+                model=model if backend == "vllm" else None,
+            )
+            + f"&& uv run omni put-samples {pool} {samples}"
+        )
+
+    def get_batch_generate_command(
+        self, model: str, task: Task, split: str, generations: List[tuple]
+    ) -> str:
+        """
+        Get the command generating the samples of several sampling configurations with a single model load.
+        A vLLM server is started in the job on a free port, queried for each configuration, then stopped.
+        """
+
+        serve_cmd = self.command_wrapper(
+            (
+                f"vllm serve {model} "
+                f"--tensor-parallel-size {self.run_config.tensor_parallel_size} "
+                f"--dtype {self.run_config.dtype} "
+                "--host 127.0.0.1 "
+                "--port $PORT "
+            ),
+            container=True,
+            model=model,
+        )
+        generate_cmds = " && ".join(
+            self.get_pool_generate_command(
+                model,
+                task,
+                split,
+                "openai",
+                temperature,
+                n_samples,
+                pool,
+                "http://127.0.0.1:$PORT/v1",
+            )
+            for temperature, n_samples, pool in generations
+        )
+
+        return (
+            "( "
+            "PORT=$(python3 -c \"import socket; s = socket.socket(); s.bind(('127.0.0.1', 0)); print(s.getsockname()[1])\") ; "
+            f"{serve_cmd}& SERVER=$! ; "
+            "trap 'kill $SERVER' EXIT ; "
+            f"uv run omni wait-server {self.run_id} --url http://127.0.0.1:$PORT && "
+            f"{generate_cmds}"
+            ")"
+        )
+
+    def get_batch_generation(self, model: str, task: Task, server: bool) -> bool:
+        """
+        Whether the samples of a task are generated by a single job, through a vLLM server started in it.
+        The server is queried with the chat-only openai backend of bigcodebench, which builds the same prompts as
+        the vllm backend only on the instruct split of chat models, so the other tasks are not batched.
+
+        Args:
+            model (str): The model generating the samples.
+            task (Task): The task of the samples.
+            server (bool): Whether the shared inference server is used.
+        """
+
+        return (
+            not server
+            and self.benchmark_config.big_code_bench.batch_generation
+            and task != Task.BIG_CODE_BENCHMARK_COMPLETE
+            and has_chat_template(model) is True
+        )
+
+    def get_backend(self, model: str, task: Task, server: bool) -> str:
+        """
+        Get the bigcodebench backend generating the samples of a task: vllm, or openai when querying a server.
+        """
+
+        if server or self.get_batch_generation(model, task, server):
+            return "openai"
+
+        return "vllm"
+
+    def get_cache_key(self, model: str, task: Task, server: bool) -> str:
+        """
+        Get the key of the results of a task in the result cache, which also depends on the generation backend,
+        as the openai backend prompts the model differently.
+        """
+
+        content = {
+            "key": super().get_cache_key(model, task, server),
+            "backend": self.get_backend(model, task, server),
+        }
+
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
 
     def run(self, model: str, task: Task, slurm: bool = False):
         """
         Run the benchmark on the BigCode dataset.
+        The samples are generated with vLLM, or through the shared inference server when one is used.
+        Samples are drawn from the sample pool of their temperature: only the largest n_samples of each temperature is generated,
+        only for the samples missing from the pool, and the smaller ones are served from it.
+        With batch generation, the samples of all the sampling configurations are generated by a single job loading the model once,
+        on the tasks where it prompts the model the same way.
         """
         jobs = []
+        execution = self.benchmark_config.execution
+        split = "complete" if task == Task.BIG_CODE_BENCHMARK_COMPLETE else "instruct"
+        batch_generation = self.get_batch_generation(
+            model, task, self.server is not None
+        )
+        backend = self.get_backend(model, task, self.server is not None)
+
+        if (
+            self.server is None
+            and self.benchmark_config.big_code_bench.batch_generation
+            and not batch_generation
+        ):
+            print(
+                f"[yellow]Batch generation only applies to the instruct split of chat models, the samples of {task} are generated by one job per configuration[/yellow]"
+            )
 
+        largest: dict[Any, Any] = {}
         for temperature, n_samples in self.parameters:
-            bench_job = self.exec(
-                self.command_wrapper(
-                    (
-                        "bigcodebench.generate "
-                        f"--model {model} "
-                        f"--temperature {temperature} "
-                        f"--n_samples {n_samples} "
-                        f"--split {'complete' if task == Task.BIG_CODE_BENCHMARK_COMPLETE else 'instruct'} "
-                        "--subset full "
-                        f"--tp {self.run_config.tensor_parallel_size} "
-                        "--backend vllm "
-                        f"--root /results/temp/{self.run_id}/{task}_{temperature}_{n_samples} "
+            largest[temperature] = max(largest.get(temperature, 0), n_samples)
+
+        pools = {
+            temperature: self.get_pool_key(
+                model, task, temperature, backend, f"{self.framework.value}_gen"
+            )
+            for temperature in largest
+        }
+        generations = [
+            (temperature, n_samples, pools[temperature])
+            for temperature, n_samples in largest.items()
+            if SamplePool(pools[temperature]).get_size() < n_samples
+        ]
+        samplings = [
+            (temperature, n_samples, pools[temperature])
+            for temperature, n_samples in self.parameters
+        ]
+
+        names = ["TEMPERATURE", "N_SAMPLES", "POOL"]
+        generate_sweep, generate_array = self.get_sweep(generations, names, slurm)
+        sweep, array = self.get_sweep(samplings, names, slurm)
+
+        generate_jobs: dict[Any, str] = {}
+        if batch_generation and generations:
+            batch_job = self.exec(
+                self.get_batch_generate_command(model, task, split, generations),
+                slurm=slurm,
+                slurm_compute="gpu",
+                name=f"{task}/generate",
+            )
+            generate_jobs = {
+                temperature: batch_job for temperature, _, _ in generations
+            }
+        elif not batch_generation:
+            for temperature, n_samples, pool in generate_sweep:
+                generate_jobs[temperature] = self.exec(
+                    self.get_pool_generate_command(
+                        model,
+                        task,
+                        split,
+                        backend,
+                        temperature,
+                        n_samples,
+                        pool,
+                        self.server.get_endpoint() if self.server is not None else "",
                     ),
-                    container=True,
                     slurm=slurm,
                     slurm_compute="gpu",
-                ),
-                slurm=slurm,
-            )
+                    slurm_array=generate_array,
+                    name=f"{task}/generate/{temperature}/{n_samples}",
+                    inference=True,
+                )
 
-            copy_job = self.exec(
-                self.command_wrapper(
-                    f"cp -r ./results/temp/{self.run_id}/{task}_{temperature}_{n_samples} ./results/temp/{self.run_id}/{task}_hard_{temperature}_{n_samples}",
-                    container=False,
-                    slurm=slurm,
-                    slurm_compute="cpu",
-                    slurm_dependency=[bench_job],
-                ),
-                slurm=slurm,
+        # Each element of an array stage only waits for the same element of the previous stage,
+        # when both stages run the same sampling configurations
+        dependency_type = (
+            "aftercorr:"
+            if array and generate_array and generations == samplings
+            else ""
+        )
+
+        for temperature, n_samples, pool in sweep:
+            if array:
+                dependencies = sorted(set(generate_jobs.values()))
+            elif temperature in generate_jobs:
+                dependencies = [generate_jobs[temperature]]
+            else:
+                dependencies = []
+
+            samples = self.get_samples_path(
+                model, task, split, backend, temperature, n_samples
+            )
+            full_folder = f"results/temp/{self.run_id}/{task}_{temperature}_{n_samples}"
+            hard_folder = (
+                f"results/temp/{self.run_id}/{task}_hard_{temperature}_{n_samples}"
             )
 
-            full_eval_job = self.exec(
-                self.command_wrapper(
+            eval_results = Path(samples).name.replace(".jsonl", "_eval_results.json")
+            pass_at_k = Path(samples).name.replace(".jsonl", "_pass_at_k.json")
+
+            # The hard tasks are a subset of the full ones: their pass@k is derived from the outcomes of the full evaluation,
+            # written in its own folder for save to tell the subsets apart
+            eval_job = self.exec(
+                f"uv run omni take-samples {pool} {n_samples} {samples} && "
+                f"mkdir -p ./{hard_folder} && "
+                + self.command_wrapper(
                     (
                         "bigcodebench.evaluate "
                         f"--model {model} "
                         f"--temperature {temperature} "
                         f"--n_samples {n_samples} "
-                        f"--samples /results/temp/{self.run_id}/{task}_{temperature}_{n_samples}/{model.replace('/', '--')}--main--bigcodebench-{'complete' if task == Task.BIG_CODE_BENCHMARK_COMPLETE else 'instruct'}--vllm-{temperature}-{n_samples}-sanitized_calibrated.jsonl "
+                        f"--samples /{samples} "
                         "--execution local "
-                        f"--split {'complete' if task == Task.BIG_CODE_BENCHMARK_COMPLETE else 'instruct'} "
+                        f"--parallel {execution.get_parallel()} "
+                        f"--min_time_limit {execution.timeout} "
+                        f"--max_as_limit {execution.memory_limit} "
+                        f"--max_data_limit {execution.memory_limit} "
+                        f"--split {split} "
                         "--subset full "
-                        "--backend vllm "
+                        f"--backend {backend} "
                     ),
                     container=True,
                     benchmark_eval=True,
-                    slurm=slurm,
-                    slurm_compute="cpu",
-                    slurm_dependency=[copy_job],
-                ),
-                slurm=slurm,
-            )
-
-            hard_eval_job = self.exec(
-                self.command_wrapper(
-                    (
-                        "bigcodebench.evaluate "
-                        f"--model {model} "
-                        f"--temperature {temperature} "
-                        f"--n_samples {n_samples} "
-                        f"--samples /results/temp/{self.run_id}/{task}_hard_{temperature}_{n_samples}/{model.replace('/', '--')}--main--bigcodebench-{'complete' if task == Task.BIG_CODE_BENCHMARK_COMPLETE else 'instruct'}--vllm-{temperature}-{n_samples}-sanitized_calibrated.jsonl "
-                        "--execution local "
-                        f"--split {'complete' if task == Task.BIG_CODE_BENCHMARK_COMPLETE else 'instruct'} "
-                        "--subset hard "
-                        "--backend vllm "
-                    ),
+                )
+                + "&& "
+                + self.command_wrapper(
+                    f"python -c {shlex.quote(HARD_PASS_AT_K_SCRIPT)} /{full_folder}/{eval_results} /{hard_folder}/{pass_at_k}",
                     container=True,
                     benchmark_eval=True,
-                    slurm=slurm,
-                    slurm_compute="cpu",
-                    slurm_dependency=[copy_job],
                 ),
                 slurm=slurm,
+                slurm_compute="cpu",
+                slurm_dependency=[dependency_type + job for job in dependencies],
+                slurm_array=array,
+                name=f"{task}/evaluate/{temperature}/{n_samples}",
             )
 
-            jobs.extend([full_eval_job, hard_eval_job])
+            jobs.append(eval_job)
 
         self.exec(
             self.command_wrapper(
                 f"uv run omni save {self.run_id} {task} {model}",
                 container=False,
-                slurm=slurm,
-                slurm_compute="cpu",
-                slurm_dependency=jobs,
             ),
             slurm=slurm,
+            slurm_compute="cpu",
+            slurm_dependency=jobs,
+            name=f"{task}/save",
         )
 
+    def get_cache_config(self) -> dict[str, Any]:
+        """
+        Get the benchmark configuration values the results depend on, including the limits of the code execution.
+        Batching the generation does not change them, the backend it uses being part of the cache key.
+        """
+
+        config = super().get_cache_config()
+        config.pop("batch_generation", None)
+
+        return {
+            **config,
+            "execution": self.benchmark_config.execution.model_dump(
+                exclude={"parallel"}
+            ),
+        }
+
+    def get_images(self) -> List[str]:
+        """
+        Get the names of the generation and evaluation images.
+        """
+
+        return [f"{self.framework.value}_gen", f"{self.framework.value}_eval"]
+
     def command_wrapper(
         self,
         command: str,
         container: bool,
-        slurm: bool,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
-        slurm_dependency: List[str] = [],
         benchmark_eval: bool = False,
+        model: Union[None, str] = None,
     ):
         """
-        Execute a command in the container.
+        Wrap a command to be executed in the container.
+        The model loaded by the command is given to be staged.
         """
 
         if container:
@@ -166,11 +446,10 @@ class BigCodeBenchRunner(BenchmarkRunner):
                 command,
                 self.framework.value + ("_eval" if benchmark_eval else "_gen"),
                 [ContainerBind(source=Path("results"), target=Path("/results"))],
+                env={} if benchmark_eval else {"OPENAI_API_KEY": "EMPTY"},
+                model=model,
             )
 
-        if slurm:
-            command = self.get_slurm_command(command, slurm_compute, slurm_dependency)
-
         return command
 
     def save(
@@ -189,6 +468,10 @@ class BigCodeBenchRunner(BenchmarkRunner):
                 with open(result_file, "r") as f:
                     data = json.load(f)
 
+                # Subsets without any scored task are written empty
+                if "pass@1" not in data:
+                    continue
+
                 subset, temperature, n_samples = folder.name.split("_")[-3:]
 
                 self.store(
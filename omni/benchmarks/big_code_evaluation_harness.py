@@ -1,13 +1,54 @@
 import ast
 import json
 from pathlib import Path
-from typing import List, Literal, Union
+import shlex
 import inquirer
 import typer
-from omni.benchmarks import BenchmarkRunner
+from omni.benchmarks import BenchmarkRunner, SamplePool
 from omni.utils.enums import Benchmark, Task
 from omni.utils.schemas import ContainerBind, SlurmConfig, RunConfig, BenchmarkConfig
 from omni.utils.functions import get_short_precision
+from typing import Any, List, Union
+from rich import print
+
+
+# Generates the samples of tasks of the harness with vLLM in a single model load, written in the layout of the harness
+# generations files: one file per task, holding one list of postprocessed generations per problem
+VLLM_GENERATE_SCRIPT = """
+import json, sys
+from types import SimpleNamespace
+from bigcode_eval import tasks
+from vllm import LLM, SamplingParams
+
+model, task_names, temperature, n_samples, tensor_parallel_size, dtype, max_length, seed, prefix = sys.argv[1:]
+llm = LLM(model=model, tensor_parallel_size=int(tensor_parallel_size), dtype=dtype, seed=int(seed))
+tokenizer = llm.get_tokenizer()
+
+problems = []
+for task_name in task_names.split(","):
+    task = tasks.get_task(task_name, SimpleNamespace(prompt="prompt", load_data_path=None))
+    problems += [(task_name, task, task.get_prompt(doc)) for doc in task.get_dataset()]
+
+params = [
+    SamplingParams(
+        n=int(n_samples),
+        temperature=float(temperature),
+        top_p=0.95 if float(temperature) > 0 else 1.0,
+        max_tokens=max(int(max_length) - len(tokenizer(prompt).input_ids), 1),
+        stop=task.stop_words or None,
+    )
+    for _, task, prompt in problems
+]
+outputs = llm.generate([prompt for _, _, prompt in problems], params)
+
+generations = {}
+for (task_name, task, prompt), output in zip(problems, outputs):
+    samples = generations.setdefault(task_name, [])
+    samples.append([task.postprocess_generation(prompt + completion.text, len(samples)) for completion in output.outputs])
+for task_name, samples in generations.items():
+    with open(f"{prefix}_{task_name}.json", "w") as f:
+        json.dump(samples, f)
+"""
 
 
 class BigCodeEvaluationHarnessRunner(BenchmarkRunner):
@@ -47,79 +88,273 @@ class BigCodeEvaluationHarnessRunner(BenchmarkRunner):
                 "No parameters provided. Please provide the parameters in the correct format."
             )
 
-        self.parameters = ast.literal_eval(response["parameters"])
+        self.parameters = self.collapse_greedy(ast.literal_eval(response["parameters"]))
 
-    def run(
+    def get_generate_command(
         self,
         model: str,
-        task: Task,
-        slurm: bool,
-    ):
+        tasks: List[Task],
+        temperature: Any,
+        n_samples: Any,
+        sampling_args: str,
+        generations: str,
+        seed: Any = 0,
+    ) -> str:
         """
-        Run the benchmark.
+        Get the command generating the samples of tasks for a sampling configuration, without executing them.
+        The model is loaded once for all the tasks, each task gets its own generations file, named after the given prefix and the task.
+        """
+
+        config = self.benchmark_config.big_code_evaluation_harness
+
+        if config.vllm_generation:
+            return (
+                f"python -c {shlex.quote(VLLM_GENERATE_SCRIPT)} "
+                f"{model} {','.join(tasks)} {temperature} {n_samples} "
+                f"{self.run_config.tensor_parallel_size} {self.run_config.dtype} "
+                f"{config.max_length_generation} {seed} {generations} "
+            )
+
+        return (
+            "accelerate launch main.py "
+            f"--model {model} "
+            f"--tasks {','.join(tasks)} "
+            f"--precision {get_short_precision(self.run_config.dtype)} "
+            f"--max_length_generation {config.max_length_generation} "
+            "--generation_only "
+            "--save_generations "
+            f"--save_generations_path {generations}.json "
+            f"--temperature {temperature} "
+            f"--n_samples {n_samples} "
+            f"--seed {seed} "
+            f"{sampling_args} "
+        )
+
+    def run_tasks(self, model: str, tasks: List[Task], slurm: bool) -> None:
+        """
+        Plan the benchmark on tasks sharing their generation jobs.
+        The generations of all the tasks are produced by a single GPU job for each temperature,
+        then each task is executed and scored by its own CPU jobs, so the GPUs are released as soon as the last token is generated.
+        Generations are drawn from the sample pool of their task and temperature: only the largest n_samples of each temperature
+        is generated, only for the generations missing from the pools, and the smaller ones are served from them.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            tasks (List[Task]): The tasks to execute.
+            slurm (bool): Whether to run the benchmark with SLURM.
         """
 
-        jobs = []
+        config = self.benchmark_config.big_code_evaluation_harness
+        jobs: dict[Task, List[str]] = {task: [] for task in tasks}
+        name = ",".join(tasks)
+        generations_folder = f"results/temp/{self.run_id}/generations"
 
+        largest: dict[Any, Any] = {}
         for temperature, n_samples in self.parameters:
-            create_folder_job = self.exec(
+            largest[temperature] = max(largest.get(temperature, 0), n_samples)
+
+        # The generations depend on the engine and on their maximum length
+        backend = f"{'vllm' if config.vllm_generation else 'accelerate'}-{config.max_length_generation}"
+        pools = {
+            temperature: [
+                self.get_pool_key(
+                    model, task, temperature, backend, self.framework.value
+                )
+                for task in tasks
+            ]
+            for temperature in largest
+        }
+
+        # The tasks of a temperature are topped up to the largest n_samples from their smallest pool,
+        # with a seed changing with the size of the pool, so the new generations differ from the pooled ones.
+        # Each new generation takes the position of the pool given by the seed, and the larger pools only keep
+        # the ones past their size, so they do not receive again the generations of a seed they already hold
+        generations = []
+        for temperature, n_samples in largest.items():
+            size = min(SamplePool(pool).get_size() for pool in pools[temperature])
+            if size < n_samples:
+                generations.append(
+                    (
+                        temperature,
+                        n_samples - size,
+                        size,
+                        "--do_sample=False" if temperature == 0 else "",
+                        *pools[temperature],
+                    )
+                )
+        samplings = [
+            (temperature, n_samples, *pools[temperature])
+            for temperature, n_samples in self.parameters
+        ]
+
+        pool_names = [f"POOL_{index}" for index in range(len(tasks))]
+        generate_sweep, generate_array = self.get_sweep(
+            generations,
+            ["TEMPERATURE", "N_SAMPLES", "SEED", "SAMPLING_ARGS", *pool_names],
+            slurm,
+        )
+        sweep, array = self.get_sweep(
+            samplings, ["TEMPERATURE", "N_SAMPLES", *pool_names], slurm
+        )
+
+        create_folder_job = self.exec(
+            self.command_wrapper(
+                "mkdir -p "
+                + " ".join(
+                    f"./results/temp/{self.run_id}/{folder}"
+                    for folder in [*tasks, "generations"]
+                ),
+                container=False,
+            ),
+            slurm=slurm,
+            slurm_compute="cpu",
+            name=f"{name}/mkdir",
+        )
+
+        generate_jobs: dict[Any, str] = {}
+        for temperature, n_samples, seed, sampling_args, *task_pools in generate_sweep:
+            new_generations = f"{generations_folder}/new_{temperature}"
+
+            generate_jobs[temperature] = self.exec(
                 self.command_wrapper(
-                    f"mkdir -p ./results/temp/{self.run_id}/{task} ",
-                    container=False,
-                    slurm=slurm,
-                    slurm_compute="cpu",
+                    self.get_generate_command(
+                        model,
+                        tasks,
+                        temperature,
+                        n_samples,
+                        sampling_args,
+                        f"/{new_generations}",
+                        seed,
+                    ),
+                    container=True,
+                    model=model,
+                )
+                + "&& "
+                + " && ".join(
+                    f"uv run omni put-generations {pool} {new_generations}_{task}.json {seed}"
+                    for task, pool in zip(tasks, task_pools)
                 ),
                 slurm=slurm,
+                slurm_compute="gpu",
+                slurm_dependency=[create_folder_job],
+                slurm_array=generate_array,
+                name=f"{name}/generate/{temperature}/{n_samples}",
             )
 
-            cmd = (
-                "accelerate launch main.py "
-                f"--model {model} "
-                f"--tasks {task} "
-                f"--precision {get_short_precision(self.run_config.dtype)} "
-                "--allow_code_execution "
-                f"--metric_output_path /results/temp/{self.run_id}/{task}/{task}_{temperature}_{n_samples}.json "
-                f"--temperature {temperature} "
-                f"--n_samples {n_samples} "
-            )
+        # Each element of the execution arrays only waits for the same element of the generation array,
+        # when both arrays hold the same temperatures
+        dependency_type = (
+            "aftercorr:"
+            if array
+            and generate_array
+            and [generation[0] for generation in generations]
+            == [sampling[0] for sampling in samplings]
+            else ""
+        )
+
+        for temperature, n_samples, *task_pools in sweep:
+            if array:
+                dependencies = sorted(set(generate_jobs.values()))
+            elif temperature in generate_jobs:
+                dependencies = [generate_jobs[temperature]]
+            else:
+                dependencies = []
+
+            for task, pool in zip(tasks, task_pools):
+                samples = f"{generations_folder}/generations_{temperature}_{n_samples}_{task}.json"
+                evaluate_cmd = (
+                    "python main.py "
+                    f"--model {model} "
+                    f"--tasks {task} "
+                    "--allow_code_execution "
+                    f"--load_generations_path /{samples} "
+                    f"--metric_output_path /results/temp/{self.run_id}/{task}/{task}_{temperature}_{n_samples}.json "
+                    f"--temperature {temperature} "
+                    f"--n_samples {n_samples} "
+                )
 
-            if temperature == 0:
-                cmd += "--do_sample=False "
+                jobs[task].append(
+                    self.exec(
+                        f"uv run omni take-generations {pool} {n_samples} {samples} && "
+                        + self.command_wrapper(
+                            evaluate_cmd,
+                            container=True,
+                        ),
+                        slurm=slurm,
+                        slurm_compute="cpu",
+                        slurm_dependency=[create_folder_job]
+                        + [dependency_type + job for job in dependencies],
+                        slurm_array=array,
+                        name=f"{task}/evaluate/{temperature}/{n_samples}",
+                    )
+                )
 
-            benchmark_job = self.exec(
+        for task in tasks:
+            self.exec(
                 self.command_wrapper(
-                    cmd,
-                    container=True,
-                    slurm=slurm,
-                    slurm_dependency=[create_folder_job],
-                    slurm_compute="gpu",
+                    f"uv run omni save {self.run_id} {task} {model}",
+                    container=False,
                 ),
                 slurm=slurm,
+                slurm_compute="cpu",
+                slurm_dependency=jobs[task],
+                name=f"{task}/save",
             )
 
-            jobs.append(benchmark_job)
+    def run(
+        self,
+        model: str,
+        task: Task,
+        slurm: bool,
+    ):
+        """
+        Run the benchmark.
+        """
 
-        self.exec(
-            self.command_wrapper(
-                f"uv run omni save {self.run_id} {task} {model}",
-                container=False,
-                slurm=slurm,
-                slurm_compute="cpu",
-                slurm_dependency=jobs,
-            ),
-            slurm=slurm,
+        self.run_tasks(model, [task], slurm)
+
+    def run_group(self, model: str, tasks: List[Task], slurm: bool) -> None:
+        """
+        Run the benchmark on a group of tasks.
+        When batching is enabled, the generations of all the tasks are produced by the same jobs, so the model is loaded
+        once per sampling configuration instead of once per task and configuration.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            tasks (List[Task]): The tasks to execute.
+            slurm (bool): Whether to run the benchmark with SLURM.
+        """
+
+        if (
+            not self.benchmark_config.big_code_evaluation_harness.batch_tasks
+            or len(tasks) < 2
+        ):
+            return super().run_group(model, tasks, slurm)
+
+        print(
+            f"[blue]------------------------ Planning {','.join(tasks)} ------------------------[blue]"
+        )
+
+        self.run_tasks(model, tasks, slurm)
+
+    def get_cache_config(self) -> dict[str, Any]:
+        """
+        Get the benchmark configuration values the results depend on, batching tasks does not change them.
+        """
+
+        return self.benchmark_config.big_code_evaluation_harness.model_dump(
+            exclude={"batch_tasks"}
         )
 
     def command_wrapper(
         self,
         command: str,
         container: bool,
-        slurm: bool,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
-        slurm_dependency: List[str] = [],
+        model: Union[None, str] = None,
     ) -> str:
         """
-        Execute a command in the container.
+        Wrap a command to be executed in the container.
+        The model loaded by the command is given to be staged.
         """
 
         if container:
@@ -128,11 +363,9 @@ class BigCodeEvaluationHarnessRunner(BenchmarkRunner):
                 self.framework.value,
                 [ContainerBind(source=Path("results"), target=Path("/results"))],
                 Path("/bigcode-evaluation-harness"),
+                model=model,
             )
 
-        if slurm:
-            command = self.get_slurm_command(command, slurm_compute, slurm_dependency)
-
         return command
 
     def save(
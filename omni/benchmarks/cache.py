@@ -0,0 +1,203 @@
+import json
+import os
+from pathlib import Path
+import socket
+import time
+from typing import Any, List, Literal, Union
+from filelock import FileLock
+from omni.utils.functions import get_process_start, has_active_slurm_jobs
+
+
+class ResultCache:
+    """
+    Results of past runs, addressed by a key derived from everything the results depend on.
+    A run computing a missing entry claims it first, so concurrent runs of the same key compute it only once.
+    A claim records its owner, the process planning the run and then the SLURM jobs it submitted,
+    and is taken over once its owner ended without storing the entry.
+    """
+
+    # Claims whose owner can not be checked, such as a process of another machine, are taken over after this time, in seconds
+    claim_timeout = 7 * 24 * 3600
+
+    def __init__(self, directory: Path = Path("results/cache")):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock = FileLock(self.directory / ".lock")
+
+    def get_entry(self, key: str) -> Path:
+        """
+        Get the file storing the results of an entry.
+        """
+
+        return self.directory / f"{key}.json"
+
+    def get_claim(self, key: str) -> Path:
+        """
+        Get the file holding the run computing an entry and its owner.
+        """
+
+        return self.directory / f"{key}.claim"
+
+    def read_claim(self, claim: Path) -> Union[None, dict[str, Any]]:
+        """
+        Read a claim, None if it was released.
+        """
+
+        try:
+            content = claim.read_text()
+        except FileNotFoundError:
+            return None
+
+        try:
+            return json.loads(content)
+        except ValueError:
+            # Claims written before the owner was recorded only hold the id of the run
+            return {"run_id": content.strip()}
+
+    def is_active(self, claim: Path) -> bool:
+        """
+        Check whether the owner of a claim may still store its entry.
+        The SLURM jobs of the run are looked up in the queue, the process of a local run on this machine in its process table,
+        and claims of other owners are kept until they time out.
+        """
+
+        data = self.read_claim(claim)
+        if data is None:
+            return False
+
+        alive = None
+        if data.get("jobs"):
+            alive = has_active_slurm_jobs(data["jobs"])
+        elif data.get("pid") and data.get("host") == socket.gethostname():
+            start = get_process_start(data["pid"])
+            alive = start is not None and start == data.get("start")
+
+        if alive is None:
+            try:
+                return time.time() - claim.stat().st_mtime < self.claim_timeout
+            except FileNotFoundError:
+                return False
+
+        return alive
+
+    def get(self, key: str) -> Union[None, List[dict[str, Any]]]:
+        """
+        Get the results of an entry.
+
+        Returns:
+            Union[None, List[dict[str, Any]]]: The stored results, None if the entry is missing.
+        """
+
+        entry = self.get_entry(key)
+        if not entry.exists():
+            return None
+
+        with open(entry, "r") as file:
+            return json.load(file)
+
+    def get_status(
+        self, key: str, run_id: str
+    ) -> Union[Literal["hit"], Literal["pending"], Literal["miss"]]:
+        """
+        Get the status of an entry for a run: stored, being computed by another run, or missing.
+        """
+
+        if self.get_entry(key).exists():
+            return "hit"
+
+        claim = self.get_claim(key)
+        data = self.read_claim(claim)
+        if data is not None and data["run_id"] != run_id and self.is_active(claim):
+            return "pending"
+
+        return "miss"
+
+    def claim(
+        self, key: str, run_id: str
+    ) -> Union[Literal["hit"], Literal["pending"], Literal["miss"]]:
+        """
+        Claim an entry for a run, unless it is stored or being computed by another run.
+        The claim is owned by the current process until it is handed over to the SLURM jobs of the run.
+
+        Returns:
+            Union[Literal["hit"], Literal["pending"], Literal["miss"]]: The status of the entry, the run owns it when missing.
+        """
+
+        with self.lock:
+            status = self.get_status(key, run_id)
+            if status == "miss":
+                self.get_claim(key).write_text(
+                    json.dumps(
+                        {
+                            "run_id": run_id,
+                            "host": socket.gethostname(),
+                            "pid": os.getpid(),
+                            "start": get_process_start(os.getpid()),
+                        }
+                    )
+                )
+
+        return status
+
+    def put(self, key: str, results: List[dict[str, Any]]) -> None:
+        """
+        Store the results of an entry and release its claim.
+        """
+
+        entry = self.get_entry(key)
+        temporary = entry.with_suffix(".tmp")
+
+        with self.lock:
+            with open(temporary, "w") as file:
+                json.dump(results, file, indent=4)
+            os.replace(temporary, entry)
+            self.get_claim(key).unlink(missing_ok=True)
+
+    def release(self, run_id: str) -> None:
+        """
+        Release the claims of a run that were never stored, so other runs can compute them.
+        """
+
+        with self.lock:
+            for claim in self.directory.glob("*.claim"):
+                data = self.read_claim(claim)
+                if data is not None and data["run_id"] == run_id:
+                    claim.unlink()
+
+    def hand_over(self, run_id: str, jobs: List[str]) -> None:
+        """
+        Hand the claims of a run over to the SLURM jobs computing them, once submitted by the process that claimed them.
+        """
+
+        with self.lock:
+            for claim in self.directory.glob("*.claim"):
+                data = self.read_claim(claim)
+                if data is not None and data["run_id"] == run_id:
+                    claim.write_text(json.dumps({"run_id": run_id, "jobs": jobs}))
+
+    def wait(self, key: str, interval: float = 30) -> List[dict[str, Any]]:
+        """
+        Wait until an entry being computed by another run is stored.
+
+        Returns:
+            List[dict[str, Any]]: The stored results.
+
+        Raises:
+            RuntimeError: If the run computing the entry stopped without storing it, or its claim timed out.
+        """
+
+        while True:
+            results = self.get(key)
+            if results is not None:
+                return results
+
+            # The entry is stored before its claim is released
+            if (
+                not self.is_active(self.get_claim(key))
+                and not self.get_entry(key).exists()
+            ):
+                raise RuntimeError(
+                    f"The run computing the cache entry {key} stopped without storing it."
+                )
+
+            time.sleep(interval)
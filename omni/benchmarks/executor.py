@@ -0,0 +1,398 @@
+import os
+import shlex
+import signal
+import subprocess
+import time
+from typing import List, Literal, Union
+from rich import print
+from omni.benchmarks.runner import JobRunner
+from omni.utils.functions import get_visible_gpus
+from omni.utils.schemas import Job, JobGraph, RunConfig, SlurmConfig
+
+
+class JobExecutor:
+    """
+    Execute a job graph in-process, starting each job as soon as its dependencies allow it.
+    Among the ready jobs, the ones with the highest priority are started first.
+    """
+
+    def __init__(
+        self, graph: JobGraph, priorities: dict[str, float] = {}, interval: float = 1
+    ):
+        self.graph = graph
+        self.priorities = priorities
+        self.interval = interval
+        self.jobs = {job.id: job for job in graph.jobs}
+        self.state: dict[
+            str,
+            Union[
+                Literal["pending"],
+                Literal["running"],
+                Literal["done"],
+                Literal["failed"],
+            ],
+        ] = {job.id: "pending" for job in graph.jobs}
+        self.processes: dict[str, subprocess.Popen] = {}
+
+    def get_command(self, job: Job) -> str:
+        """
+        Get the shell command starting the job.
+        """
+
+        return job.command
+
+    def get_env(self, job: Job) -> dict[str, str]:
+        """
+        Get the environment of the job.
+        """
+
+        return os.environ.copy()
+
+    def acquire(self, job: Job) -> bool:
+        """
+        Reserve the resources of the job, returns whether they are available.
+        """
+
+        return True
+
+    def release(self, job: Job) -> None:
+        """
+        Release the resources of the job.
+        """
+
+    def get_readiness(
+        self, job: Job
+    ) -> Union[Literal["ready"], Literal["waiting"], Literal["invalid"]]:
+        """
+        Check the dependencies of a job, following the SLURM dependency types.
+        A job whose dependencies can never be satisfied is invalid.
+        """
+
+        readiness: Union[Literal["ready"], Literal["waiting"], Literal["invalid"]] = (
+            "ready"
+        )
+
+        for dependency in job.dependencies:
+            dependency_type, _, job_id = dependency.rpartition(":")
+            state = self.state.get(job_id, "failed")
+
+            if dependency_type == "after":
+                satisfied = state != "pending"
+            elif dependency_type == "afterany":
+                satisfied = state in ("done", "failed")
+            else:
+                if state == "failed":
+                    return "invalid"
+                satisfied = state == "done"
+
+            if not satisfied:
+                readiness = "waiting"
+
+        return readiness
+
+    def start(self, job: Job) -> None:
+        """
+        Start a job in its own process group.
+        """
+
+        command = self.get_command(job)
+        print(f"[black]Running command: {command}[/black]")
+
+        self.processes[job.id] = subprocess.Popen(
+            command,
+            shell=True,
+            env=self.get_env(job),
+            start_new_session=True,
+        )
+        self.state[job.id] = "running"
+
+    def stop(self, job: Job) -> None:
+        """
+        Stop a running service job.
+        """
+
+        process = self.processes[job.id]
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+        del self.processes[job.id]
+        self.state[job.id] = "done"
+        self.release(job)
+
+    def is_unused(self, job: Job) -> bool:
+        """
+        Check whether all the jobs depending on a service are finished.
+        """
+
+        return all(
+            self.state[other.id] in ("done", "failed")
+            for other in self.graph.get_dependents(job.id)
+        )
+
+    def run(self) -> bool:
+        """
+        Execute the graph until all jobs are finished.
+
+        Returns:
+            bool: Whether all the jobs succeeded.
+        """
+
+        while any(state in ("pending", "running") for state in self.state.values()):
+            progress = False
+
+            for job in sorted(
+                self.graph.jobs, key=lambda job: -self.priorities.get(job.id, 0)
+            ):
+                if self.state[job.id] != "pending":
+                    continue
+
+                readiness = self.get_readiness(job)
+                if readiness == "invalid":
+                    print(f"[red]Job {job.id} skipped, a dependency failed.[/red]")
+                    self.state[job.id] = "failed"
+                    progress = True
+                elif readiness == "ready" and self.acquire(job):
+                    self.start(job)
+                    progress = True
+
+            for job_id, process in list(self.processes.items()):
+                job = self.jobs[job_id]
+                returncode = process.poll()
+
+                if returncode is None:
+                    if job.service and self.is_unused(job):
+                        self.stop(job)
+                        progress = True
+                    continue
+
+                del self.processes[job_id]
+                self.state[job_id] = "done" if returncode == 0 else "failed"
+                self.release(job)
+                progress = True
+
+                if returncode != 0:
+                    print(f"[red]Job {job_id} failed with code {returncode}.[/red]")
+
+            if not progress:
+                if not self.processes:
+                    raise RuntimeError(
+                        "The job graph can not make progress, some jobs can never be started."
+                    )
+
+                time.sleep(self.interval)
+
+        return all(state == "done" for state in self.state.values())
+
+
+class SequentialJobExecutor(JobExecutor):
+    """
+    Execute a job graph on the local machine, one job at a time.
+    Services, such as the inference server, run alongside the other jobs.
+    """
+
+    def __init__(
+        self, graph: JobGraph, priorities: dict[str, float] = {}, interval: float = 1
+    ):
+        super().__init__(graph, priorities, interval)
+
+        self.busy = False
+
+    def acquire(self, job: Job) -> bool:
+        """
+        Reserve the machine for the job, unless another job is running.
+        """
+
+        if job.service:
+            return True
+
+        if self.busy:
+            return False
+        self.busy = True
+        return True
+
+    def release(self, job: Job) -> None:
+        """
+        Give the machine back.
+        """
+
+        if not job.service:
+            self.busy = False
+
+
+class SlurmJobExecutor:
+    """
+    Submit a job graph as SLURM jobs, the highest priority first so the scheduler sees the critical path early.
+    Dependencies are translated to the SLURM job ids, services are cancelled once all the jobs depending on them are finished.
+    """
+
+    def __init__(
+        self,
+        graph: JobGraph,
+        run_config: RunConfig,
+        slurm_config: SlurmConfig,
+        priorities: dict[str, float] = {},
+    ):
+        self.graph = graph
+        self.priorities = priorities
+        self.runner = JobRunner(graph.run_id, run_config, slurm_config)
+        self.slurm_ids: dict[str, str] = {}
+
+    def run(self) -> bool:
+        """
+        Submit all the jobs of the graph.
+
+        Returns:
+            bool: Whether all the jobs were submitted.
+        """
+
+        slurm_ids = self.slurm_ids
+
+        for job in self.graph.get_order(self.priorities):
+            dependencies = []
+            for dependency in job.dependencies:
+                dependency_type, separator, job_id = dependency.rpartition(":")
+                dependencies.append(
+                    f"{dependency_type}{separator}{slurm_ids.get(job_id, job_id)}"
+                )
+
+            slurm_ids[job.id] = self.runner.exec(
+                job.command,
+                slurm=True,
+                slurm_compute=job.compute,
+                slurm_dependency=dependencies,
+                slurm_array=job.array,
+            )
+
+        for job in self.graph.jobs:
+            if not job.service:
+                continue
+
+            self.runner.exec(
+                f"scancel {slurm_ids[job.id]}",
+                slurm=True,
+                slurm_dependency=[
+                    f"afterany:{slurm_ids[other.id]}"
+                    for other in self.graph.get_dependents(job.id)
+                ],
+            )
+
+        return True
+
+
+class PackedJobExecutor(JobExecutor):
+    """
+    Execute a job graph inside a single SLURM allocation, each job being a job step.
+    """
+
+    def __init__(
+        self,
+        graph: JobGraph,
+        run_config: RunConfig,
+        slurm_config: SlurmConfig,
+        priorities: dict[str, float] = {},
+        interval: float = 1,
+    ):
+        super().__init__(graph, priorities, interval)
+
+        if slurm_config.packed is None:
+            raise ValueError("SLURM packed information is not provided.")
+
+        self.run_config = run_config
+        self.packed_config = slurm_config.packed
+
+    def get_command(self, job: Job) -> str:
+        """
+        Get the srun command running the job as a step of the allocation.
+        Steps only get the resources they ask for, so GPU jobs are packed side by side.
+        """
+
+        if job.compute == "gpu":
+            resources = {
+                "gpus": self.run_config.tensor_parallel_size,
+                **self.packed_config.gpu.model_dump(),
+            }
+        else:
+            resources = {"gres": "none", **self.packed_config.cpu.model_dump()}
+
+        return (
+            "srun "
+            "--ntasks=1 "
+            "--exact "
+            "--output=./logs/slurm-%j-%s.out "
+            "--error=./logs/slurm-%j-%s.err "
+            + " ".join(
+                f"--{key.replace('_', '-')}='{value}'"
+                for key, value in resources.items()
+            )
+            + f" sh -c {shlex.quote(job.command)}"
+        )
+
+
+class LocalJobExecutor(JobExecutor):
+    """
+    Execute a job graph on the local machine.
+    GPUs are split into slots of tensor_parallel_size GPUs, each GPU job getting its own slot through CUDA_VISIBLE_DEVICES,
+    while CPU jobs are limited by a separate worker pool.
+    """
+
+    def __init__(
+        self,
+        graph: JobGraph,
+        run_config: RunConfig,
+        priorities: dict[str, float] = {},
+        interval: float = 1,
+    ):
+        super().__init__(graph, priorities, interval)
+
+        gpus = run_config.local.gpus
+        if gpus is None:
+            gpus = get_visible_gpus()
+
+        size = run_config.tensor_parallel_size
+        self.free_slots = [
+            gpus[index : index + size] for index in range(0, len(gpus) - size + 1, size)
+        ]
+        self.free_workers = run_config.local.cpu_workers
+        self.slots: dict[str, List[str]] = {}
+
+        if not self.free_slots and any(job.compute == "gpu" for job in graph.jobs):
+            raise ValueError(
+                f"No slot of {size} GPUs available, {len(gpus)} GPUs found."
+            )
+
+    def get_env(self, job: Job) -> dict[str, str]:
+        """
+        Get the environment of the job, restricted to the GPUs of its slot.
+        """
+
+        env = super().get_env(job)
+        env["CUDA_VISIBLE_DEVICES"] = ",".join(self.slots.get(job.id, []))
+
+        return env
+
+    def acquire(self, job: Job) -> bool:
+        """
+        Reserve a GPU slot or a CPU worker for the job.
+        """
+
+        if job.compute == "gpu":
+            if not self.free_slots:
+                return False
+            self.slots[job.id] = self.free_slots.pop(0)
+            return True
+
+        if self.free_workers == 0:
+            return False
+        self.free_workers -= 1
+        return True
+
+    def release(self, job: Job) -> None:
+        """
+        Give the GPU slot or the CPU worker of the job back to the pool.
+        """
+
+        if job.compute == "gpu":
+            self.free_slots.append(self.slots.pop(job.id))
+        else:
+            self.free_workers += 1
@@ -0,0 +1,106 @@
+from collections import defaultdict
+import json
+import re
+from pathlib import Path
+import shlex
+from string import Template
+from typing import List
+from omni.utils.schemas import Job, JobGraph
+
+
+class JobHistory:
+    """
+    Durations of the jobs of past runs, used to estimate the ones of a new run.
+    Each successful job appends its duration to a JSON lines file, keyed by model and job name.
+    """
+
+    # Estimated durations, in seconds, of jobs never run before
+    default_durations = {"cpu": 600.0, "gpu": 3600.0}
+
+    def __init__(self, path: Path = Path("results/durations.jsonl")):
+        self.path = path
+
+    def load(self) -> dict[tuple[str, str], List[float]]:
+        """
+        Load the recorded durations, grouped by model and job name.
+        """
+
+        durations: dict[tuple[str, str], List[float]] = defaultdict(list)
+
+        if not self.path.exists():
+            return durations
+
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    durations[(record["model"], record["name"])].append(
+                        float(record["duration"])
+                    )
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+        return durations
+
+    def estimate(self, graph: JobGraph) -> dict[str, float]:
+        """
+        Estimate the duration of each job of the graph.
+        The mean of the past durations of the same job on the same model is used, then on any model,
+        then a default duration for its compute type. A job array lasts as long as its longest element.
+
+        Returns:
+            dict[str, float]: The estimated duration of each job, in seconds.
+        """
+
+        history = self.load()
+        by_name: dict[str, List[float]] = defaultdict(list)
+        for (_, name), durations in history.items():
+            by_name[name].extend(durations)
+
+        def estimate_name(job: Job, name: str) -> float:
+            durations = history.get((graph.model, name)) or by_name.get(name)
+            if durations:
+                return sum(durations) / len(durations)
+            return self.default_durations[job.compute]
+
+        estimates: dict[str, float] = {}
+        for job in graph.jobs:
+            if job.service:
+                estimates[job.id] = 0.0
+            elif job.array:
+                estimates[job.id] = max(
+                    estimate_name(job, Template(job.name).safe_substitute(variables))
+                    for variables in job.array
+                )
+            else:
+                estimates[job.id] = estimate_name(job, job.name)
+
+        return estimates
+
+    def record(self, model: str, name: str, duration: float) -> None:
+        """
+        Append the duration of a job to the history.
+        """
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(
+                json.dumps({"model": model, "name": name, "duration": duration}) + "\n"
+            )
+
+    def instrument(self, graph: JobGraph) -> None:
+        """
+        Make the jobs of the graph record their duration once they succeed.
+        Names are double-quoted so that the variables of job arrays are expanded, the other shell characters being escaped.
+        """
+
+        for job in graph.jobs:
+            if job.service or not job.name:
+                continue
+
+            name = re.sub(r'(["\\`])', r"\\\1", job.name)
+            job.command = (
+                "OMNI_START=$(date +%s) && "
+                f"{{ {job.command} ; }} && "
+                f'uv run omni record-duration {shlex.quote(graph.model)} "{name}" "$(($(date +%s) - OMNI_START))"'
+            )
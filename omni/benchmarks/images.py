@@ -0,0 +1,73 @@
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, Union
+from filelock import FileLock
+
+
+class ImageManifest:
+    """
+    Build records of the images of the images directory: the hash of the definition and build arguments
+    each image was built from, the digest of the built image and the identity of its file, which tells
+    whether the image was replaced since.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / "manifest.json"
+        self.lock = FileLock(directory / ".manifest.lock")
+
+    def load(self) -> dict[str, dict[str, Any]]:
+        """
+        Get the build records of all the images.
+        """
+
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except ValueError:
+            return {}
+
+    def get(self, image: str) -> Union[None, dict[str, Any]]:
+        """
+        Get the build record of an image.
+
+        Returns:
+            Union[None, dict[str, Any]]: The record, None if the image was not built by omni.
+        """
+
+        return self.load().get(image)
+
+    def put(self, image: str, build_hash: str, digest: str, identity: str) -> None:
+        """
+        Record the build of an image.
+        """
+
+        with self.lock:
+            manifest = self.load()
+            manifest[image] = {
+                "hash": build_hash,
+                "digest": digest,
+                "identity": identity,
+                "built": time.time(),
+            }
+
+            temporary = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(temporary, "w") as file:
+                json.dump(manifest, file, indent=4)
+            os.replace(temporary, self.path)
+
+    @staticmethod
+    def get_identity(path: Path) -> str:
+        """
+        Get the identity of an image file from its size, modification time and inode, without reading it.
+        """
+
+        stat = path.stat()
+
+        return f"{stat.st_size}-{stat.st_mtime_ns}-{stat.st_ino}"
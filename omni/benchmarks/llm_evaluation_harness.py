@@ -1,10 +1,12 @@
 import json
-from omni.benchmarks import BenchmarkRunner
-from typing import List, Literal, Union
+import re
+from omni.benchmarks import BenchmarkRunner, SampleStore
+from typing import Any, Iterator, List, Union
 from omni.utils.enums import Benchmark, Task
 from omni.utils.schemas import RunConfig, SlurmConfig, ContainerBind
 from pathlib import Path
 from omni.utils.schemas import BenchmarkConfig
+from rich import print
 
 
 class LlmEvaluationHarnessRunner(BenchmarkRunner):
@@ -23,6 +25,44 @@ class LlmEvaluationHarnessRunner(BenchmarkRunner):
             slurm_config,
         )
 
+    def get_eval_command(self, model: str, tasks: List[Task], output_path: str) -> str:
+        """
+        Get the lm_eval command evaluating the model on the given tasks.
+        The model is loaded with vLLM, or queried through the shared inference server when one is used.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            tasks (List[Task]): The tasks to evaluate in the same invocation.
+            output_path (str): The folder where lm_eval writes its results.
+        """
+
+        benchmark_args = ",".join(
+            f"{key}={value}"
+            for key, value in self.benchmark_config.llm_evaluation_harness.get_model_args().items()
+        )
+
+        if self.server is not None:
+            model_args = (
+                "--model local-completions "
+                f"--model_args model={model},base_url={self.server.get_endpoint()}/completions,num_concurrent={self.server.config.num_concurrent},tokenized_requests=False,{benchmark_args} "
+                "--batch_size 1 "
+            )
+        else:
+            model_args = (
+                "--model vllm "
+                f"--model_args pretrained={model},tensor_parallel_size={self.run_config.tensor_parallel_size},dtype={self.run_config.dtype},gpu_memory_utilization=0.9,{benchmark_args} "
+                "--batch_size auto "
+            )
+
+        return (
+            "lm_eval "
+            f"{model_args}"
+            f"--tasks {','.join(tasks)} "
+            f"--output_path {output_path} "
+            f"--log_samples "
+            "--confirm_run_unsafe_code "
+        )
+
     def run(self, model: str, task: Task, slurm: bool = False):
         """
         Run the benchmark.
@@ -34,44 +74,95 @@ class LlmEvaluationHarnessRunner(BenchmarkRunner):
 
         job = self.exec(
             self.command_wrapper(
-                (
-                    "lm_eval "
-                    "--model vllm "
-                    f"--model_args pretrained={model},tensor_parallel_size={self.run_config.tensor_parallel_size},dtype={self.run_config.dtype},gpu_memory_utilization=0.9,{','.join(f'{key}={value}' for key, value in self.benchmark_config.llm_evaluation_harness.model_dump().items())} "
-                    f"--tasks {task} "
-                    "--batch_size auto "
-                    f"--output_path /results/temp/{self.run_id}/{task} "
-                    f"--log_samples "
-                    "--confirm_run_unsafe_code "
+                self.get_eval_command(
+                    model, [task], f"/results/temp/{self.run_id}/{task}"
                 ),
                 container=True,
-                slurm=slurm,
-                slurm_compute="gpu",
+                model=model,
             ),
             slurm=slurm,
+            slurm_compute="gpu",
+            name=f"{task}/evaluate",
+            inference=True,
         )
 
         self.exec(
             self.command_wrapper(
                 f"uv run omni save {self.run_id} {task} {model}",
                 container=False,
-                slurm=slurm,
-                slurm_compute="cpu",
-                slurm_dependency=[job],
             ),
             slurm=slurm,
+            slurm_compute="cpu",
+            slurm_dependency=[job],
+            name=f"{task}/save",
+        )
+
+    def run_group(self, model: str, tasks: List[Task], slurm: bool = False):
+        """
+        Run the benchmark on a group of tasks.
+        When batching is enabled, all the tasks are evaluated in a single lm_eval invocation so the model is loaded only once,
+        the combined output is then split back into per-task results by the save job of each task.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            tasks (List[Task]): The tasks to execute.
+        """
+
+        if (
+            not self.benchmark_config.llm_evaluation_harness.batch_tasks
+            or len(tasks) < 2
+        ):
+            return super().run_group(model, tasks, slurm)
+
+        print(
+            f"[blue]------------------------ Planning {','.join(tasks)} ------------------------[blue]"
+        )
+
+        job = self.exec(
+            self.command_wrapper(
+                self.get_eval_command(
+                    model,
+                    tasks,
+                    f"/results/temp/{self.run_id}/{self.framework.value}",
+                ),
+                container=True,
+                model=model,
+            ),
+            slurm=slurm,
+            slurm_compute="gpu",
+            name=f"{','.join(tasks)}/evaluate",
+            inference=True,
         )
 
+        # Each task is saved by its own job, so a task failing to save does not prevent saving the others
+        for task in tasks:
+            self.exec(
+                self.command_wrapper(
+                    f"uv run omni save {self.run_id} {task} {model}",
+                    container=False,
+                ),
+                slurm=slurm,
+                slurm_compute="cpu",
+                slurm_dependency=[job],
+                name=f"{task}/save",
+            )
+
+    def get_cache_config(self) -> dict[str, Any]:
+        """
+        Get the benchmark configuration values the results depend on, batching tasks does not change them.
+        """
+
+        return self.benchmark_config.llm_evaluation_harness.get_model_args()
+
     def command_wrapper(
         self,
         command: str,
         container: bool,
-        slurm: bool,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
-        slurm_dependency: List[str] = [],
+        model: Union[None, str] = None,
     ):
         """
-        Execute a command in the container.
+        Wrap a command to be executed in the container.
+        The model loaded by the command is given to be staged.
         """
 
         if container:
@@ -79,23 +170,81 @@ class LlmEvaluationHarnessRunner(BenchmarkRunner):
                 command,
                 self.framework.value,
                 [ContainerBind(source=Path("results"), target=Path("/results"))],
+                model=model,
             )
 
-        if slurm:
-            command = self.get_slurm_command(command, slurm_compute, slurm_dependency)
-
         return command
 
     def save(self, model: str, task: Task):
         """
         Save the results of the benchmark.
+        The results are read from the task folder, or from the batch folder when the task was evaluated along with others.
         """
 
-        filename = next(
-            Path(f"results/temp/{self.run_id}/{task}").rglob("*.json"), None
-        )
+        folder = Path(f"results/temp/{self.run_id}/{task}")
+        if not folder.exists():
+            folder = Path(f"results/temp/{self.run_id}/{self.framework.value}")
 
-        if filename is not None:
+        for filename in folder.rglob("*.json"):
             with open(filename, "r") as f:
                 result = json.load(f)
+
+            if task in result.get("results", {}):
                 self.store(model, task, result["results"][task])
+                self.save_samples(task, result, filename.parent)
+                break
+
+    def get_subtasks(self, task: str, result: dict[str, Any]) -> List[str]:
+        """
+        Get the tasks whose samples are logged for a task, the leaves of its group when it is one.
+        """
+
+        subtasks = result.get("group_subtasks", {}).get(task)
+        if not subtasks:
+            return [task]
+
+        return [
+            leaf for subtask in subtasks for leaf in self.get_subtasks(subtask, result)
+        ]
+
+    def get_samples(self, files: dict[str, Path]) -> Iterator[dict[str, Any]]:
+        """
+        Stream the compact samples of the logged sample files, one record at a time.
+        """
+
+        for task, path in files.items():
+            with open(path, "r") as file:
+                for line in file:
+                    record = json.loads(line)
+
+                    yield {
+                        "task": task,
+                        "doc_id": record.get("doc_id"),
+                        "filter": record.get("filter"),
+                        "target": record.get("target"),
+                        "prediction": record.get("filtered_resps"),
+                        "scores": {
+                            metric: record.get(metric)
+                            for metric in record.get("metrics", [])
+                        },
+                    }
+
+    def save_samples(self, task: Task, result: dict[str, Any], folder: Path):
+        """
+        Save the per-sample results of a task from the sample files logged by lm_eval next to its results.
+        Only the latest file of each subtask is kept, the samples are streamed so large files fit in memory.
+        """
+
+        subtasks = set(self.get_subtasks(task, result))
+        files: dict[str, Path] = {}
+
+        # Sample files are named after their task and the date of the evaluation
+        for path in sorted(folder.glob("samples_*.jsonl")):
+            match = re.match(
+                r"^samples_(.+)_(\d{4}-\d{2}-\d{2}T[^_]+)\.jsonl$", path.name
+            )
+            if match is not None and match.group(1) in subtasks:
+                files[match.group(1)] = path
+
+        if files:
+            SampleStore(self.run_id).write(task, self.get_samples(files))
@@ -0,0 +1,188 @@
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, List
+from filelock import FileLock
+
+
+class SamplePool:
+    """
+    Generated samples of a model on a task at a given temperature, shared by all the runs and n_samples values.
+    A sampling configuration takes the first samples of each problem from the pool, so only the samples missing
+    from it are generated, and a smaller n_samples is served from a larger pool without generating anything.
+    Samples are stored one JSON record per line, the problem of each record being given by its key field.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        directory: Path = Path("results/pools"),
+        key_field: str = "task_id",
+    ):
+        self.key = key
+        self.key_field = key_field
+        self.path = directory / f"{key}.jsonl"
+        self.meta = directory / f"{key}.json"
+        directory.mkdir(parents=True, exist_ok=True)
+        self.lock = FileLock(directory / f"{key}.lock")
+
+    def get_size(self) -> int:
+        """
+        Get the number of samples available for every problem of the pool.
+
+        Returns:
+            int: The smallest number of samples of a problem, 0 if the pool is empty.
+        """
+
+        if not self.meta.exists():
+            return 0
+
+        with open(self.meta, "r") as file:
+            return json.load(file)["size"]
+
+    def take(self, n_samples: int, target: Path) -> int:
+        """
+        Write the first samples of each problem of the pool to a samples file.
+        The target is left untouched when the pool is empty.
+
+        Args:
+            n_samples (int): The number of samples of each problem to take.
+            target (Path): The samples file to write.
+
+        Returns:
+            int: The number of samples written.
+        """
+
+        if not self.path.exists():
+            return 0
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_suffix(f".{os.getpid()}.tmp")
+        counts: Counter = Counter()
+
+        with self.lock, open(self.path, "r") as pool, open(temporary, "w") as file:
+            for line in pool:
+                problem = json.loads(line)[self.key_field]
+                if counts[problem] < n_samples:
+                    counts[problem] += 1
+                    file.write(line)
+        os.replace(temporary, target)
+
+        return sum(counts.values())
+
+    def put(self, source: Path) -> int:
+        """
+        Add the samples of a file that are missing from the pool.
+        The first samples of each problem of the file are the ones taken from the pool, so only the following ones are added.
+        When another run grew the pool in the meantime, fewer samples are added, so the pool never holds a sample twice.
+
+        Args:
+            source (Path): The samples file, generated after taking samples from the pool.
+
+        Returns:
+            int: The number of samples added.
+        """
+
+        with self.lock:
+            counts: Counter = Counter()
+            if self.path.exists():
+                with open(self.path, "r") as pool:
+                    for line in pool:
+                        counts[json.loads(line)[self.key_field]] += 1
+
+            seen: Counter = Counter()
+            added = 0
+            with open(source, "r") as file, open(self.path, "a") as pool:
+                for line in file:
+                    problem = json.loads(line)[self.key_field]
+                    seen[problem] += 1
+                    if seen[problem] > counts[problem]:
+                        pool.write(line if line.endswith("\n") else f"{line}\n")
+                        added += 1
+                pool.flush()
+                os.fsync(pool.fileno())
+
+            for problem in seen:
+                counts[problem] = max(counts[problem], seen[problem])
+
+            self.set_size(counts)
+
+        return added
+
+    def add(self, records: Iterable[dict[str, Any]], start: int) -> int:
+        """
+        Add new samples to the pool, generated with a seed given by the position of their first sample.
+        The samples of each problem take the positions from start on, and the ones at positions the pool already holds are skipped,
+        so a pool that grew past start, from another pool of its batch or another run, never holds a sample of a seed twice.
+
+        Args:
+            records (Iterable[dict[str, Any]]): The samples to add.
+            start (int): The position of the first sample of each problem.
+
+        Returns:
+            int: The number of samples added.
+        """
+
+        with self.lock:
+            counts: Counter = Counter()
+            if self.path.exists():
+                with open(self.path, "r") as pool:
+                    for line in pool:
+                        counts[json.loads(line)[self.key_field]] += 1
+
+            positions: Counter = Counter()
+            added = 0
+            with open(self.path, "a") as pool:
+                for record in records:
+                    problem = record[self.key_field]
+                    position = start + positions[problem]
+                    positions[problem] += 1
+                    if position < counts[problem]:
+                        continue
+
+                    counts[problem] += 1
+                    pool.write(json.dumps(record) + "\n")
+                    added += 1
+                pool.flush()
+                os.fsync(pool.fileno())
+
+            self.set_size(counts)
+
+        return added
+
+    def read(self, n_samples: int) -> List[dict[str, Any]]:
+        """
+        Get the first samples of each problem of the pool.
+
+        Args:
+            n_samples (int): The number of samples of each problem to get.
+
+        Returns:
+            List[dict[str, Any]]: The samples, empty if the pool is empty.
+        """
+
+        if not self.path.exists():
+            return []
+
+        counts: Counter = Counter()
+        records = []
+
+        with self.lock, open(self.path, "r") as pool:
+            for line in pool:
+                record = json.loads(line)
+                if counts[record[self.key_field]] < n_samples:
+                    counts[record[self.key_field]] += 1
+                    records.append(record)
+
+        return records
+
+    def set_size(self, counts: Counter) -> None:
+        """
+        Record the number of samples available for every problem, from the number of samples of each problem.
+        """
+
+        temporary = self.meta.with_suffix(".tmp")
+        with open(temporary, "w") as file:
+            json.dump({"size": min(counts.values(), default=0)}, file)
+        os.replace(temporary, self.meta)
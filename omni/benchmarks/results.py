@@ -0,0 +1,349 @@
+import gzip
+import json
+import os
+import sqlite3
+from pathlib import Path
+import time
+from typing import Any, Iterable, Iterator, List, Union
+
+
+class ResultStore:
+    """
+    Append-only log of the results of a run, one JSON record per line.
+    Each record is appended with a single write, so concurrent save jobs never wait for each other,
+    and a record cut short by a crash is skipped when the log is read.
+    """
+
+    def __init__(self, run_id: str, directory: Path = Path("results")):
+        self.run_id = run_id
+        self.log = directory / f"{run_id}.jsonl"
+        self.view = directory / f"{run_id}.json"
+
+    def append(self, model: str, task: str, result: dict[str, Any]) -> None:
+        """
+        Append a result of a task to the log.
+        """
+
+        record = json.dumps(
+            {
+                "model": model,
+                "task": task,
+                "timestamp": time.time(),
+                "result": result,
+            }
+        )
+
+        self.log.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f"{record}\n".encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def records(self) -> List[dict[str, Any]]:
+        """
+        Read the complete records of the log.
+        """
+
+        if not self.log.exists():
+            return []
+
+        records = []
+        with open(self.log, "r") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return records
+
+    def load(self) -> dict[str, Union[str, list]]:
+        """
+        Get the results of the run in the layout of the per-run JSON file: the model, then the list of results of each task.
+        """
+
+        data: dict[str, Union[str, list]] = {}
+
+        for record in self.records():
+            data.setdefault("model", record["model"])
+            results = data.setdefault(record["task"], [])
+            if isinstance(results, list):
+                results.append(record["result"])
+
+        return data
+
+    def export(self) -> Path:
+        """
+        Write the per-run JSON file from the log.
+
+        Returns:
+            Path: The written file.
+        """
+
+        temporary = self.view.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, "w") as file:
+            json.dump(self.load(), file, indent=4)
+        os.replace(temporary, self.view)
+
+        return self.view
+
+
+class ResultIndex:
+    """
+    SQLite index of the results of all the runs, one row per metric of each result.
+    It is updated incrementally: only the end of the logs appended since the last update is read,
+    and per-run JSON files of older runs are indexed again only when they change.
+    """
+
+    # Result fields describing the evaluation rather than measuring it
+    fields = ("temperature", "n_samples", "subset")
+
+    def __init__(self, directory: Path = Path("results")):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.directory / "index.sqlite")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                run_id TEXT,
+                size INTEGER,
+                mtime INTEGER,
+                offset INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                run_id TEXT,
+                model TEXT,
+                task TEXT,
+                metric TEXT,
+                value REAL,
+                temperature TEXT,
+                n_samples TEXT,
+                subset TEXT,
+                timestamp REAL
+            );
+            CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+            CREATE INDEX IF NOT EXISTS results_model_task ON results (model, task);
+            CREATE INDEX IF NOT EXISTS results_task ON results (task);
+            """
+        )
+
+    def get_rows(
+        self,
+        run_id: str,
+        model: str,
+        task: str,
+        timestamp: float,
+        result: dict[str, Any],
+    ) -> List[tuple]:
+        """
+        Get the index rows of a result, one for each numeric metric.
+        """
+
+        description = [
+            None if result.get(field) is None else str(result[field])
+            for field in self.fields
+        ]
+
+        return [
+            (run_id, model, task, metric, float(value), *description, timestamp)
+            for metric, value in result.items()
+            if metric not in self.fields
+            and isinstance(value, (int, float))
+            and not isinstance(value, bool)
+        ]
+
+    def update(self) -> None:
+        """
+        Index the results written since the last update.
+        """
+
+        indexed = {
+            path: (size, mtime, offset)
+            for path, size, mtime, offset in self.connection.execute(
+                "SELECT path, size, mtime, offset FROM files"
+            )
+        }
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            name = entry.name
+            if not entry.is_file() or not (
+                name.endswith(".jsonl") or name.endswith(".json")
+            ):
+                continue
+
+            # The per-run JSON file of a run with a log is only a view of it
+            if name.endswith(".json") and os.path.exists(f"{entry.path}l"):
+                continue
+
+            entries.append(entry)
+
+        with self.connection:
+            # Results of removed files are dropped first, a run may be indexed again from another file
+            for path in indexed.keys() - {entry.path for entry in entries}:
+                self.connection.execute(
+                    "DELETE FROM results WHERE run_id IN (SELECT run_id FROM files WHERE path = ?)",
+                    (path,),
+                )
+                self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+            for entry in entries:
+                name = entry.name
+                run_id = name.rsplit(".", 1)[0]
+                stat = entry.stat()
+                size, mtime, offset = indexed.get(entry.path, (0, 0, 0))
+                if size == stat.st_size and mtime == stat.st_mtime_ns:
+                    continue
+
+                # Logs are append-only, anything else is indexed again from the start
+                if not name.endswith(".jsonl") or stat.st_size < size:
+                    offset = 0
+                if offset == 0:
+                    self.connection.execute(
+                        "DELETE FROM results WHERE run_id = ?", (run_id,)
+                    )
+
+                rows: List[tuple] = []
+                with open(entry.path, "rb") as file:
+                    file.seek(offset)
+                    content = file.read()
+
+                if name.endswith(".jsonl"):
+                    # A line without its newline is still being written
+                    complete = content[: content.rfind(b"\n") + 1]
+                    offset += len(complete)
+                    for line in complete.splitlines():
+                        try:
+                            record = json.loads(line)
+                            rows.extend(
+                                self.get_rows(
+                                    run_id,
+                                    record["model"],
+                                    record["task"],
+                                    record["timestamp"],
+                                    record["result"],
+                                )
+                            )
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            continue
+                else:
+                    offset = len(content)
+                    try:
+                        data = json.loads(content)
+                        for task, results in data.items():
+                            if isinstance(results, list):
+                                for result in results:
+                                    rows.extend(
+                                        self.get_rows(
+                                            run_id,
+                                            data["model"],
+                                            task,
+                                            stat.st_mtime,
+                                            result,
+                                        )
+                                    )
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        pass
+
+                self.connection.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (entry.path, run_id, stat.st_size, stat.st_mtime_ns, offset),
+                )
+
+    def query(
+        self,
+        models: List[str] = [],
+        tasks: List[str] = [],
+        metrics: List[str] = [],
+        run_ids: List[str] = [],
+    ) -> List[dict[str, Any]]:
+        """
+        Get the indexed results, most recent first.
+        Filters accept `*` wildcards and an empty filter matches everything.
+
+        Returns:
+            List[dict[str, Any]]: The matching rows.
+        """
+
+        conditions = []
+        values: List[str] = []
+
+        for column, patterns in (
+            ("model", models),
+            ("task", tasks),
+            ("metric", metrics),
+            ("run_id", run_ids),
+        ):
+            if patterns:
+                conditions.append(
+                    "(" + " OR ".join(f"{column} GLOB ?" for _ in patterns) + ")"
+                )
+                values.extend(patterns)
+
+        cursor = self.connection.execute(
+            "SELECT * FROM results"
+            + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+            + " ORDER BY timestamp DESC",
+            values,
+        )
+        columns = [description[0] for description in cursor.description]
+
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+class SampleStore:
+    """
+    Compact per-sample results of a run, one gzipped JSON lines file per task.
+    Samples are streamed record by record, so memory use does not depend on the number of samples.
+    """
+
+    def __init__(self, run_id: str, directory: Path = Path("results/samples")):
+        self.run_id = run_id
+        self.directory = directory / run_id
+
+    def get_path(self, task: str) -> Path:
+        """
+        Get the file storing the samples of a task.
+        """
+
+        return self.directory / f"{task}.jsonl.gz"
+
+    def write(self, task: str, samples: Iterable[dict[str, Any]]) -> int:
+        """
+        Write the samples of a task, replacing the previous ones.
+
+        Returns:
+            int: The number of samples written.
+        """
+
+        path = self.get_path(task)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+
+        count = 0
+        with gzip.open(temporary, "wt") as file:
+            for sample in samples:
+                file.write(json.dumps(sample) + "\n")
+                count += 1
+        os.replace(temporary, path)
+
+        return count
+
+    def read(self, task: str) -> Iterator[dict[str, Any]]:
+        """
+        Read the samples of a task, one at a time.
+        """
+
+        path = self.get_path(task)
+        if not path.exists():
+            return
+
+        with gzip.open(path, "rt") as file:
+            for line in file:
+                yield json.loads(line)
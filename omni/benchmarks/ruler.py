@@ -1,16 +1,47 @@
+import csv
+import hashlib
 import json
+import re
 from pathlib import Path
-from typing import List, Literal, Union
+import shlex
+from typing import List, Union
 import inquirer
 import typer
 from omni.benchmarks.runner import BenchmarkRunner
 from omni.utils.enums import Benchmark, Task
 from omni.utils.schemas import RunConfig, BenchmarkConfig, SlurmConfig, ContainerBind
+from omni.utils.functions import get_max_model_length, get_tokenizer_fingerprint
+from rich import print
+
+
+# Prepares the synthetic data of all the RULER tasks at a context length, the way run.sh does
+PREPARE_SCRIPT = """
+source config_tasks.sh
+for TASK in "${synthetic[@]}"; do
+    python data/prepare.py \\
+        --save_dir /ruler_data \\
+        --benchmark synthetic \\
+        --task $TASK \\
+        --tokenizer_path $MODEL_PATH \\
+        --tokenizer_type hf \\
+        --max_seq_length $SEQ_LENGTH \\
+        --model_template_type $MODEL_TEMPLATE_TYPE \\
+        --num_samples $NUM_SAMPLES \\
+        --random_seed $SEED || exit 1
+done
+"""
 
 
 class RulerRunner(BenchmarkRunner):
     needs_parameters = True
 
+    # Defaults of run.sh and data/prepare.py, the synthetic data depends on them
+    num_samples = 500
+    seed = 42
+
+    # Synthetic data of past runs, one folder per key
+    data_directory = Path("results/ruler_data")
+
     def __init__(
         self,
         run_id: str,
@@ -65,73 +96,197 @@ class RulerRunner(BenchmarkRunner):
             "context_length": int(response["context_length"]),
         }
 
+    def get_context_lengths(self, model: str) -> List[int]:
+        """
+        Get the context lengths to evaluate, longest first: the powers of two from 4096 up to the chosen context length,
+        without the ones longer than the model supports according to its configuration.
+        """
+
+        context_lengths = []
+        length = 4096
+        while length <= self.parameters["context_length"]:
+            context_lengths.append(length)
+            length *= 2
+
+        max_length = get_max_model_length(model)
+        if max_length is None:
+            print(
+                f"[yellow]The maximum length of {model} is unknown, no context length is skipped[/yellow]"
+            )
+            return context_lengths[::-1]
+
+        skipped = [length for length in context_lengths if length > max_length]
+        if skipped:
+            print(
+                f"[yellow]Skipping the context lengths {', '.join(map(str, skipped))}, longer than the {max_length} tokens supported by {model}[/yellow]"
+            )
+
+        return [length for length in context_lengths if length <= max_length][::-1]
+
+    def get_data_key(self, model: str, context_length: int) -> str:
+        """
+        Get the key of the synthetic data of a context length in the data cache.
+        The data only depends on the tokenizer, the prompt template, the context length, the number of samples and the seed,
+        so models sharing a tokenizer share their data.
+        """
+
+        content = {
+            "tokenizer": get_tokenizer_fingerprint(model),
+            "prompt_template": self.parameters["prompt_template"],
+            "context_length": context_length,
+            "num_samples": self.num_samples,
+            "seed": self.seed,
+            "image": self.get_image_fingerprint(self.framework.value),
+        }
+
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
     def run(self, model: str, task: Task, slurm: bool = False):
         """
         Run the benchmark.
+        Each context length is evaluated by its own job, longest first, so the longest one does not hold back the others.
+        The synthetic data of each context length is taken from the data cache, the missing ones being prepared by CPU jobs
+        before the GPU jobs start, and run.sh skips preparing the data it finds.
 
         Args:
             model (str): The model to run the benchmark on.
             task (Task): The task to execute.
         """
 
+        context_lengths = self.get_context_lengths(model)
+        if not context_lengths:
+            print(
+                f"[yellow]No context length of at least 4096 tokens is supported by {model}, {task} is skipped[/yellow]"
+            )
+            return
+
+        keys = {length: self.get_data_key(model, length) for length in context_lengths}
+        run_path = f"./results/temp/{self.run_id}/{Task.RULER_SYNTHETIC}"
+
         mkdir_job = self.exec(
             self.command_wrapper(
-                f"mkdir -p ./results/temp/{self.run_id}/{Task.RULER_SYNTHETIC}",
+                "mkdir -p "
+                + " ".join(
+                    f"{run_path}/{model}/synthetic/{length}/data"
+                    for length in context_lengths
+                ),
                 container=False,
-                slurm=slurm,
-                slurm_compute="cpu",
             ),
             slurm=slurm,
+            slurm_compute="cpu",
+            name=f"{task}/mkdir",
         )
 
-        # Generate context lengths based on the provided context length
-        start = 4096
-        context_lengths = []
-        while start <= self.parameters["context_length"]:
-            context_lengths.append(str(start))
-            start *= 2
+        names = ["SEQ_LENGTH", "DATA_KEY"]
+        preparations = [
+            (str(length), keys[length])
+            for length in context_lengths
+            if not (self.data_directory / keys[length] / ".complete").exists()
+        ]
+        lengths = [(str(length), keys[length]) for length in context_lengths]
+        prepare_sweep, prepare_array = self.get_sweep(preparations, names, slurm)
+        sweep, array = self.get_sweep(lengths, names, slurm)
 
-        ruler_job = self.exec(
-            self.command_wrapper(
-                (
-                    "bash -c '"
-                    f"export MODEL_TEMPLATE_TYPE={self.parameters['prompt_template']} && "
-                    f"export MODEL_PATH={model} && "
-                    f"export MODEL_FRAMEWORK=vllm && "
-                    f"export GPUS={self.run_config.tensor_parallel_size} && "
-                    f"export THREADS={self.benchmark_config.ruler.thread_count} && "
-                    f"export SEQ_LENGTHS='{' '.join(context_lengths)}' && "
-                    f"./run.sh {model} synthetic' "
-                ),
-                container=True,
+        prepare_jobs: dict[str, str] = {}
+        for context_length, key in prepare_sweep:
+            data = self.data_directory / key
+            prepare_jobs[context_length] = self.exec(
+                f"mkdir -p {data} && flock {data}.lock "
+                + self.command_wrapper(
+                    f"bash -c {shlex.quote(PREPARE_SCRIPT)} ",
+                    container=True,
+                    env={
+                        "MODEL_PATH": model,
+                        "MODEL_TEMPLATE_TYPE": self.parameters["prompt_template"],
+                        "SEQ_LENGTH": context_length,
+                        "NUM_SAMPLES": str(self.num_samples),
+                        "SEED": str(self.seed),
+                    },
+                    binds=[ContainerBind(source=data, target=Path("/ruler_data"))],
+                )
+                + f"&& touch {data}/.complete",
                 slurm=slurm,
-                slurm_compute="gpu",
-                slurm_dependency=[mkdir_job],
-            ),
-            slurm=slurm,
+                slurm_compute="cpu",
+                slurm_array=prepare_array,
+                name=f"{task}/prepare/{context_length}",
+            )
+
+        # Each element of the evaluation array only waits for the same element of the preparation array,
+        # when both arrays hold the same context lengths
+        dependency_type = (
+            "aftercorr:" if array and prepare_array and preparations == lengths else ""
         )
 
+        jobs = []
+        for context_length, key in sweep:
+            if array:
+                dependencies = sorted(set(prepare_jobs.values()))
+            elif context_length in prepare_jobs:
+                dependencies = [prepare_jobs[context_length]]
+            else:
+                dependencies = []
+
+            jobs.append(
+                self.exec(
+                    self.command_wrapper(
+                        f"./run.sh {model} synthetic",
+                        container=True,
+                        env={
+                            "MODEL_TEMPLATE_TYPE": self.parameters["prompt_template"],
+                            "MODEL_PATH": model,
+                            "MODEL_FRAMEWORK": "openai"
+                            if self.server is not None
+                            else "vllm",
+                            "GPUS": str(self.run_config.tensor_parallel_size),
+                            "THREADS": str(self.benchmark_config.ruler.thread_count),
+                            "SEQ_LENGTHS": context_length,
+                        },
+                        binds=[
+                            ContainerBind(
+                                source=self.data_directory / key,
+                                target=Path(
+                                    f"/RULER/scripts/benchmark_root/{model}/synthetic/{context_length}/data"
+                                ),
+                            )
+                        ],
+                        model=model,
+                        inference=True,
+                    ),
+                    slurm=slurm,
+                    slurm_compute="gpu",
+                    slurm_dependency=[mkdir_job]
+                    + [dependency_type + job for job in dependencies],
+                    slurm_array=array,
+                    name=f"{task}/evaluate/{context_length}",
+                    inference=True,
+                )
+            )
+
         self.exec(
             self.command_wrapper(
                 f"uv run omni save {self.run_id} {task} {model}",
                 container=False,
-                slurm=slurm,
-                slurm_compute="cpu",
-                slurm_dependency=[ruler_job],
             ),
             slurm=slurm,
+            slurm_compute="cpu",
+            slurm_dependency=jobs,
+            name=f"{task}/save",
         )
 
     def command_wrapper(
         self,
         command: str,
         container: bool,
-        slurm: bool,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
-        slurm_dependency: List[str] = [],
+        env: dict[str, str] = {},
+        binds: List[ContainerBind] = [],
+        model: Union[None, str] = None,
+        inference: bool = False,
     ):
         """
-        Execute a command in the container.
+        Wrap a command to be executed in the container.
+        The settings of run.sh are given as environment variables of the container, and the model loaded by the command is given to be staged.
+        When the shared inference server is used, the inference commands query it through the OpenAI client of RULER.
+        Other commands, such as the data preparation, may run before the server is started, so they are not pointed at it.
         """
 
         if container:
@@ -144,20 +299,121 @@ class RulerRunner(BenchmarkRunner):
                             f"./results/temp/{self.run_id}/{Task.RULER_SYNTHETIC}"
                         ),
                         target=Path("/RULER/scripts/benchmark_root"),
-                    )
+                    ),
+                    *binds,
                 ],
                 Path("/RULER/scripts"),
+                {
+                    **env,
+                    **(
+                        {
+                            "OPENAI_BASE_URL": self.server.get_endpoint(),
+                            "OPENAI_API_KEY": "EMPTY",
+                        }
+                        if inference and self.server is not None
+                        else {}
+                    ),
+                },
+                model=model,
             )
 
-        if slurm:
-            command = self.get_slurm_command(command, slurm_compute, slurm_dependency)
-
         return command
 
+    def get_summary_scores(self, pred_dir: Path) -> dict[str, float]:
+        """
+        Get the scores of the summary files written by the RULER evaluation of a context length.
+        """
+
+        scores: dict[str, float] = {}
+
+        for summary in pred_dir.glob("summary*.csv"):
+            with open(summary, "r", newline="") as file:
+                rows = {row[0]: row[1:] for row in csv.reader(file) if row}
+
+            for name, score in zip(rows.get("Tasks", []), rows.get("Score", [])):
+                try:
+                    scores[name] = float(score)
+                except ValueError:
+                    continue
+
+        return scores
+
+    def get_prediction_score(self, predictions: Path) -> Union[None, float]:
+        """
+        Get the score of the predictions of a RULER task, streamed one sample at a time.
+        Question answering tasks need any of their answers in the prediction, the other ones all of them.
+        """
+
+        match_any = predictions.stem.startswith("qa")
+        total = 0.0
+        count = 0
+
+        with open(predictions, "r") as file:
+            for line in file:
+                try:
+                    sample = json.loads(line)
+                except ValueError:
+                    continue
+
+                prediction = re.sub(r"[\x00-\x1f]", "\n", sample["pred"].strip())
+                prediction = prediction.strip().lower()
+                matches = [
+                    float(reference.lower() in prediction)
+                    for reference in sample["outputs"]
+                ]
+                # A sample without reference can not be scored
+                if not matches:
+                    continue
+
+                total += max(matches) if match_any else sum(matches) / len(matches)
+                count += 1
+
+        return total / count * 100 if count else None
+
     def save(self, model: str, task: Task):
         """
-        Save the results of the benchmark.
-        TODO: Implement the save logic for RulerRunner
+        Save the results of the benchmark: the score of each RULER task at each context length, their average at each
+        context length, stored with the context length as subset, and the RULER score averaged over the context lengths.
+        The scores come from the summary files of the RULER evaluation, and are computed from the predictions when missing.
+        The prediction files are streamed, so the memory use does not grow with the context length or the number of samples.
         """
 
-    pass
+        scores: dict[int, dict[str, float]] = {}
+
+        for pred_dir in Path(f"results/temp/{self.run_id}/{task}").rglob("pred"):
+            if not pred_dir.is_dir() or not pred_dir.parent.name.isdigit():
+                continue
+
+            length_scores = self.get_summary_scores(pred_dir)
+            for predictions in sorted(pred_dir.glob("*.jsonl")):
+                if predictions.stem not in length_scores:
+                    score = self.get_prediction_score(predictions)
+                    if score is not None:
+                        length_scores[predictions.stem] = score
+
+            if length_scores:
+                scores[int(pred_dir.parent.name)] = length_scores
+
+        for context_length, length_scores in sorted(scores.items()):
+            self.store(
+                model,
+                task,
+                {
+                    "score": sum(length_scores.values()) / len(length_scores),
+                    **length_scores,
+                    "subset": str(context_length),
+                },
+            )
+
+        if scores:
+            self.store(
+                model,
+                task,
+                {
+                    "score": sum(
+                        sum(length_scores.values()) / len(length_scores)
+                        for length_scores in scores.values()
+                    )
+                    / len(scores),
+                },
+            )
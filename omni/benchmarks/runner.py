@@ -1,43 +1,64 @@
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
+import hashlib
 from pathlib import Path
+import shlex
 import subprocess
-from typing import Any, List, Literal, Union
+from typing import Any, List, Literal, Tuple, Union
 import os
 import json
 from omni.utils.enums import Benchmark, Task
-from omni.utils.schemas import RunConfig, SlurmConfig, ContainerBind, BenchmarkConfig
+from omni.utils.functions import get_file_fingerprint, get_model_fingerprint
+from omni.benchmarks.results import ResultStore
+from omni.utils.schemas import (
+    RunConfig,
+    SlurmConfig,
+    ContainerBind,
+    BenchmarkConfig,
+    JobGraph,
+)
 from rich import print
 
 
-class BenchmarkRunner(metaclass=ABCMeta):
-    needs_parameters = False
-
+class JobRunner:
     def __init__(
         self,
         run_id: str,
-        framework: Benchmark,
         run_config: RunConfig,
-        benchmark_config: BenchmarkConfig,
         slurm_config: Union[None, SlurmConfig],
     ):
         self.run_id = run_id
-        self.framework = framework
         self.run_config = run_config
-        self.benchmark_config = benchmark_config
         self.slurm_config = slurm_config
+        self.graph: Union[None, JobGraph] = None
 
     def get_slurm_command(
         self,
         command: str,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
+        slurm_compute: Union[Literal["cpu"], Literal["gpu"], Literal["packed"]],
         slurm_dependency: List[str] = [],
+        slurm_array: List[dict[str, str]] = [],
     ) -> str:
         """
         Get the SLURM command for the benchmark.
+        Dependencies are job ids, which default to the `afterok` type, or `type:job_id` entries such as `after:1234`.
+        When array variables are given, a job array is submitted and each element sets its own variables from `SLURM_ARRAY_TASK_ID`.
+        The `packed` compute requests the single allocation of the packed mode.
         """
         if not self.slurm_config:
             raise ValueError("SLURM information is not provided.")
 
+        if slurm_array:
+            cases = " ".join(
+                f"{index}) "
+                + " ".join(
+                    f"{name}={shlex.quote(value)}" for name, value in variables.items()
+                )
+                + " ;;"
+                for index, variables in enumerate(slurm_array)
+            )
+            command = f"case $SLURM_ARRAY_TASK_ID in {cases} esac && {command}"
+
         if self.slurm_config.prescript:
             command = f"{self.slurm_config.prescript} && {command}"
 
@@ -47,33 +68,36 @@ class BenchmarkRunner(metaclass=ABCMeta):
             "--output=./logs/slurm-%j.out "
             "--error=./logs/slurm-%j.err "
             "--kill-on-invalid-dep=yes "
-            f'--wrap="{command}" '
+            f"--wrap={shlex.quote(command)} "
         )
 
-        dependencies = (
-            ["afterok:" + ":".join(slurm_dependency)] if slurm_dependency else []
-        )
+        if slurm_array:
+            cmd += f"--array=0-{len(slurm_array) - 1} "
 
-        if slurm_compute == "cpu":
-            cmd += (
-                " ".join(
-                    f"--{key.replace('_', '-')}='{value}'"
-                    for key, value in self.slurm_config.cpu.model_dump().items()
-                )
-                + " "
-            )
+        dependencies = defaultdict(list)
+        for dependency in slurm_dependency:
+            dependency_type, _, job_id = dependency.rpartition(":")
+            dependencies[dependency_type or "afterok"].append(job_id)
 
+        if slurm_compute == "cpu":
+            resources = self.slurm_config.cpu
         elif slurm_compute == "gpu":
-            cmd += (
-                " ".join(
-                    f"--{key.replace('_', '-')}='{value}'"
-                    for key, value in self.slurm_config.gpu.model_dump().items()
-                )
-                + " "
+            resources = self.slurm_config.gpu
+        elif self.slurm_config.packed is not None:
+            resources = self.slurm_config.packed.allocation
+        else:
+            raise ValueError("SLURM packed information is not provided.")
+
+        cmd += (
+            " ".join(
+                f"--{key.replace('_', '-')}='{value}'"
+                for key, value in resources.model_dump().items()
             )
+            + " "
+        )
 
         if dependencies:
-            cmd += f" --dependency={':'.join(dependencies)} "
+            cmd += f" --dependency={','.join(f'{dependency_type}:' + ':'.join(job_ids) for dependency_type, job_ids in dependencies.items())} "
 
         return cmd
 
@@ -83,17 +107,47 @@ class BenchmarkRunner(metaclass=ABCMeta):
         image_name: str,
         binds: list[ContainerBind] = [],
         cwd: Path = Path("."),
+        env: dict[str, str] = {},
+        model: Union[None, str] = None,
     ) -> str:
         """
         Get the Container command for the benchmark.
+        When staging is enabled, the job runs a copy of the image on the local storage of its node,
+        and the folder of the model it loads is bound to a copy on the local storage of its node.
         """
 
         cmd = f"{self.run_config.container_system} exec --nv -c --cwd {cwd} "
 
-        if len(self.run_config.binds + binds) > 0:
-            cmd += f"-B {','.join((bind.source.as_posix() + ':' + bind.target.as_posix() for bind in self.run_config.binds + binds))} "
+        mounts = [
+            bind.source.as_posix() + ":" + bind.target.as_posix()
+            for bind in self.run_config.binds + binds
+        ]
 
-        cmd += f"{self.run_config.images_directory}/{image_name}.sif {command} "
+        # Models of the hub are not staged, only local folders
+        staging = self.run_config.staging
+        if staging.models and model is not None and Path(model).is_dir():
+            path = Path(model).absolute().as_posix()
+            max_size = (
+                f" --max-size {staging.max_size}"
+                if staging.max_size is not None
+                else ""
+            )
+            # The copy is bound last, over the binds holding the model, and kept on the node while the shell of the job runs
+            mounts.append(
+                f'$(uv run omni stage-model {path} "{staging.directory}"{max_size} --user $$):{path}'
+            )
+
+        if len(mounts) > 0:
+            cmd += f"-B {','.join(mounts)} "
+
+        for key, value in env.items():
+            cmd += f"--env {key}={value} "
+
+        image = f"{self.run_config.images_directory}/{image_name}.sif"
+        if self.run_config.staging.images:
+            image = f'$(uv run omni stage-image {image} "{self.run_config.staging.directory}")'
+
+        cmd += f"{image} {command} "
 
         return cmd
 
@@ -101,11 +155,37 @@ class BenchmarkRunner(metaclass=ABCMeta):
         self,
         command: str,
         slurm: bool,
+        slurm_compute: Union[Literal["cpu"], Literal["gpu"], Literal["packed"]] = "cpu",
+        slurm_dependency: List[str] = [],
+        slurm_array: List[dict[str, str]] = [],
+        name: str = "",
     ) -> str:
         """
-        Execute a command in the container.
+        Execute a command, either directly or as a SLURM job.
+        When a job graph is attached, the command is added to it instead, to be executed once the whole run is planned.
+
+        Args:
+            command (str): The command to execute.
+            slurm (bool): Whether to submit the command as a SLURM job.
+            slurm_compute (Literal["cpu", "gpu"]): The SLURM resources to use.
+            slurm_dependency (List[str]): The SLURM jobs the command depends on.
+            slurm_array (List[dict[str, str]]): The variables of each element when submitted as a job array.
+            name (str): The name of the job in the graph, stable across runs to estimate its duration.
+
+        Returns:
+            str: The SLURM job id, the graph job id, or an empty string when run directly.
         """
 
+        if self.graph is not None and slurm_compute != "packed":
+            return self.graph.add(
+                command, slurm_compute, slurm_dependency, slurm_array, name
+            )
+
+        if slurm:
+            command = self.get_slurm_command(
+                command, slurm_compute, slurm_dependency, slurm_array
+            )
+
         print(f"[black]Running command: {command}[/black]")
         output = subprocess.run(
             command,
@@ -120,6 +200,223 @@ class BenchmarkRunner(metaclass=ABCMeta):
 
         return job_id
 
+
+class BenchmarkRunner(JobRunner, metaclass=ABCMeta):
+    needs_parameters = False
+
+    def __init__(
+        self,
+        run_id: str,
+        framework: Benchmark,
+        run_config: RunConfig,
+        benchmark_config: BenchmarkConfig,
+        slurm_config: Union[None, SlurmConfig],
+    ):
+        super().__init__(run_id, run_config, slurm_config)
+        self.framework = framework
+        self.benchmark_config = benchmark_config
+        self.server = None
+
+    def exec(
+        self,
+        command: str,
+        slurm: bool,
+        slurm_compute: Union[Literal["cpu"], Literal["gpu"]] = "cpu",
+        slurm_dependency: List[str] = [],
+        slurm_array: List[dict[str, str]] = [],
+        name: str = "",
+        inference: bool = False,
+    ) -> str:
+        """
+        Execute a command, either directly or as a SLURM job.
+        Inference commands are pointed at the shared inference server when one is used for the run.
+        They no longer need GPUs and wait for the server to be healthy before starting.
+
+        Args:
+            command (str): The command to execute.
+            slurm (bool): Whether to submit the command as a SLURM job.
+            slurm_compute (Literal["cpu", "gpu"]): The SLURM resources to use.
+            slurm_dependency (List[str]): The SLURM jobs the command depends on.
+            slurm_array (List[dict[str, str]]): The variables of each element when submitted as a job array.
+            name (str): The name of the job in the graph, stable across runs to estimate its duration.
+            inference (bool): Whether the command runs inference on the model.
+
+        Returns:
+            str: The SLURM job id, the graph job id, or an empty string when run directly.
+        """
+
+        if not inference or self.server is None:
+            return super().exec(
+                command, slurm, slurm_compute, slurm_dependency, slurm_array, name
+            )
+
+        return super().exec(
+            self.server.get_client_command(command),
+            slurm,
+            "cpu",
+            slurm_dependency + self.server.get_client_dependency(),
+            slurm_array,
+            name,
+        )
+
+    def get_container_command(
+        self,
+        command: str,
+        image_name: str,
+        binds: list[ContainerBind] = [],
+        cwd: Path = Path("."),
+        env: dict[str, str] = {},
+        model: Union[None, str] = None,
+    ) -> str:
+        """
+        Get the Container command for the benchmark.
+        The model is not staged when the shared inference server loads it instead.
+        """
+
+        return super().get_container_command(
+            command,
+            image_name,
+            binds,
+            cwd,
+            env,
+            model if self.server is None else None,
+        )
+
+    def get_sweep(
+        self, parameters: List[tuple], names: List[str], slurm: bool
+    ) -> Tuple[List[tuple], List[dict[str, str]]]:
+        """
+        Get the sweep points to run and the job array variables.
+        When job arrays are enabled, the sweep is submitted once: its single point is made of shell variables,
+        set by each element of the array from its own values.
+
+        Args:
+            parameters (List[tuple]): The sweep points.
+            names (List[str]): The shell variable name of each parameter.
+            slurm (bool): Whether the benchmark runs with SLURM.
+
+        Returns:
+            Tuple[List[tuple], List[dict[str, str]]]: The points to run and the variables of each array element, empty without job array.
+        """
+
+        if (
+            not slurm
+            or self.slurm_config is None
+            or not self.slurm_config.job_arrays
+            or self.slurm_config.packed is not None
+            or len(parameters) < 2
+        ):
+            return parameters, []
+
+        return [tuple(f"${{{name}}}" for name in names)], [
+            {name: str(value) for name, value in zip(names, point)}
+            for point in parameters
+        ]
+
+    def collapse_greedy(self, parameters: List[tuple]) -> List[tuple]:
+        """
+        Collapse the greedy sampling configurations to a single sample.
+        At temperature 0 every sample is the same, so generating more than one only spends GPU time on duplicates.
+
+        Args:
+            parameters (List[tuple]): The (temperature, n_samples) sampling configurations.
+
+        Returns:
+            List[tuple]: The configurations without duplicates, greedy ones with a single sample.
+        """
+
+        collapsed: dict[tuple, None] = {}
+        for temperature, n_samples in parameters:
+            if float(temperature) == 0:
+                if n_samples != 1:
+                    print(
+                        f"[yellow]Temperature 0 is greedy, generating a single sample instead of {n_samples}[/yellow]"
+                    )
+                temperature, n_samples = 0, 1
+            collapsed.setdefault((temperature, n_samples))
+
+        return list(collapsed)
+
+    def get_images(self) -> List[str]:
+        """
+        Get the names of the images used by the benchmark.
+        """
+
+        return [self.framework.value]
+
+    def get_cache_config(self) -> dict[str, Any]:
+        """
+        Get the benchmark configuration values the results depend on.
+        """
+
+        return self.benchmark_config.model_dump(by_alias=True).get(
+            self.framework.value, {}
+        )
+
+    def get_image_fingerprint(self, image: str) -> str:
+        """
+        Get the fingerprint of an image of the images directory.
+        """
+
+        return get_file_fingerprint(
+            Path(self.run_config.images_directory) / f"{image}.sif"
+        )
+
+    def get_pool_key(
+        self, model: str, task: Task, temperature: Any, backend: str, image: str
+    ) -> str:
+        """
+        Get the key of the sample pool of a task at a temperature.
+        It changes whenever the model or the generation setup change, but not with the number of samples.
+
+        Args:
+            model (str): The model generating the samples.
+            task (Task): The task of the samples.
+            temperature (Any): The sampling temperature.
+            backend (str): The generation backend.
+            image (str): The image generating the samples.
+        """
+
+        content = {
+            "model": get_model_fingerprint(model),
+            "task": task,
+            "temperature": float(temperature),
+            "backend": backend,
+            "dtype": self.run_config.dtype,
+            "image": self.get_image_fingerprint(image),
+        }
+
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get_cache_key(self, model: str, task: Task, server: bool) -> str:
+        """
+        Get the key of the results of a task in the result cache.
+        It changes whenever the model, the parameters, the configuration or the images of the benchmark change.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            task (Task): The task to execute.
+            server (bool): Whether the shared inference server is used.
+        """
+
+        images = self.get_images() + ([self.run_config.server.image] if server else [])
+
+        content = {
+            "model": get_model_fingerprint(model),
+            "task": task,
+            "parameters": getattr(self, "parameters", None),
+            "dtype": self.run_config.dtype,
+            "config": self.get_cache_config(),
+            "server": server,
+            "images": {image: self.get_image_fingerprint(image) for image in images},
+        }
+
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
     @abstractmethod
     def run(self, model: str, task: Task, slurm: bool) -> None:
         """
@@ -132,17 +429,32 @@ class BenchmarkRunner(metaclass=ABCMeta):
         """
         pass
 
+    def run_group(self, model: str, tasks: List[Task], slurm: bool) -> None:
+        """
+        Plan the benchmark on a group of tasks of the same framework.
+        By default each task is run on its own, frameworks able to share work between tasks can override it.
+
+        Args:
+            model (str): The model to run the benchmark on.
+            tasks (List[Task]): The tasks to execute.
+            slurm (bool): Whether to run the benchmark with SLURM.
+        """
+
+        for task in tasks:
+            print(
+                f"[blue]------------------------ Planning {task} ------------------------[blue]"
+            )
+
+            self.run(model, task, slurm)
+
     @abstractmethod
     def command_wrapper(
         self,
         command: str,
         container: bool,
-        slurm: bool,
-        slurm_compute: Union[Literal["cpu"], Literal["gpu"]],
-        slurm_dependency: List[str] = [],
     ) -> str:
         """
-        Execute a command in the container.
+        Wrap a command to be executed in the container of the benchmark.
         """
         pass
 
@@ -153,24 +465,7 @@ class BenchmarkRunner(metaclass=ABCMeta):
         result: dict[str, Any],
     ) -> None:
         """
-        Save the results of the benchmark.
+        Save the results of the benchmark, appended to the results log of the run.
         """
 
-        filename = f"results/{self.run_id}.json"
-        data: dict[str, Union[str, list]]
-
-        if os.path.exists(filename):
-            with open(filename, "r") as file:
-                data = json.load(file)
-        else:
-            data = {
-                "model": model,
-            }
-
-        if task not in data:
-            data[task] = [result]
-        elif isinstance(data[task], list):
-            data[task].append(result)  # type: ignore data[task] is a list
-
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
+        ResultStore(self.run_id).append(model, task, result)
@@ -0,0 +1,111 @@
+from pathlib import Path
+import time
+from typing import List, Union
+from omni.benchmarks.runner import JobRunner
+from omni.utils.functions import wait_for_server
+from omni.utils.schemas import RunConfig, SlurmConfig
+
+
+class InferenceServer(JobRunner):
+    """
+    OpenAI-compatible vLLM server shared by all the benchmarks of a run.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        run_config: RunConfig,
+        slurm_config: Union[None, SlurmConfig],
+    ):
+        super().__init__(run_id, run_config, slurm_config)
+
+        self.config = run_config.server
+        self.url_file = Path(f"results/temp/{run_id}/server.url")
+        self.job = ""
+
+    def start(self, model: str) -> None:
+        """
+        Add the inference server for the model to the job graph of the run.
+        The server is a service writing its url once running, stopped by the executor once all its clients are done.
+
+        Args:
+            model (str): The model to serve.
+        """
+
+        if self.graph is None:
+            raise ValueError("The inference server needs the job graph of the run.")
+
+        command = self.get_container_command(
+            (
+                f"vllm serve {model} "
+                f"--tensor-parallel-size {self.run_config.tensor_parallel_size} "
+                f"--dtype {self.run_config.dtype} "
+                "--host 0.0.0.0 "
+                f"--port {self.config.port} "
+            ),
+            self.config.image,
+            model=model,
+        )
+
+        command = (
+            f"mkdir -p {self.url_file.parent} && "
+            f"echo http://$(hostname):{self.config.port} > {self.url_file} && "
+            f"{command}"
+        )
+
+        self.job = self.graph.add(command, "gpu", name="server", service=True)
+
+    def wait(self, interval: float = 5) -> None:
+        """
+        Wait until the server of the run, started by its own job, is healthy.
+
+        Args:
+            interval (float): The time between two checks, in seconds.
+
+        Raises:
+            TimeoutError: If the server is not healthy before the startup timeout.
+        """
+
+        deadline = time.monotonic() + self.config.startup_timeout
+
+        while not self.url_file.exists():
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"The inference server did not write {self.url_file} after {self.config.startup_timeout} seconds."
+                )
+            time.sleep(interval)
+
+        wait_for_server(
+            self.url_file.read_text().strip(),
+            max(deadline - time.monotonic(), 0),
+            interval=interval,
+        )
+
+    def get_url(self) -> str:
+        """
+        Get the base url of the server.
+        The host is only known once the server job runs, so the url is read at execution time.
+        """
+
+        return f"$(cat {self.url_file})"
+
+    def get_endpoint(self) -> str:
+        """
+        Get the OpenAI-compatible endpoint of the server.
+        """
+
+        return f"{self.get_url()}/v1"
+
+    def get_client_command(self, command: str) -> str:
+        """
+        Get the command of a client, waiting for the server to be healthy first.
+        """
+
+        return f"uv run omni wait-server {self.run_id} && {command}"
+
+    def get_client_dependency(self) -> List[str]:
+        """
+        Get the dependencies of a client, which can start once the server job is running.
+        """
+
+        return [f"after:{self.job}"]
@@ -0,0 +1,185 @@
+import hashlib
+import os
+from pathlib import Path
+import shutil
+from typing import Callable, Union
+from filelock import FileLock, Timeout
+from omni.utils.functions import get_process_start
+
+
+class NodeCache:
+    """
+    Copies of files or folders of the shared filesystem on the local storage of a node, shared by the jobs running on it.
+    Each copy is stored under a key identifying the content of its source, so an outdated copy is never used,
+    and a lock per key makes concurrent jobs on the node copy a source only once.
+    When the cache is bounded, the least recently used copies are evicted to make room for new ones. The jobs using a copy
+    register their process, and a copy is never evicted while one of them runs.
+    """
+
+    def __init__(self, directory: Path, max_size: Union[None, int] = None):
+        self.directory = directory.absolute()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    def stage(
+        self,
+        source: Path,
+        key: str,
+        verify: Union[None, Callable[[Path], bool]] = None,
+        user: Union[None, int] = None,
+    ) -> Path:
+        """
+        Get the local copy of a file or folder, copying it first when the node does not hold it yet.
+        The copy is written next to its final path and only moved there once complete and checked, so a copy found
+        at its final path is always valid.
+
+        Args:
+            source (Path): The file or folder to copy.
+            key (str): The name of the copy, unique to the content of the source.
+            verify (Union[None, Callable[[Path], bool]]): Whether a copy matches its source, checked before it is used.
+            user (Union[None, int]): The process using the copy, which is kept until it ends.
+
+        Returns:
+            Path: The local copy of the source.
+
+        Raises:
+            ValueError: If the copy does not match its source, or does not fit in the cache.
+        """
+
+        target = self.directory / (f"{key}{source.suffix}" if source.is_file() else key)
+
+        with FileLock(self.directory / f"{target.name}.lock"):
+            # The user is registered under the lock of the copy, so the copy cannot be evicted before it is used
+            if user is not None:
+                self.add_user(target, user)
+
+            if target.exists():
+                # The modification time of a copy is its last use
+                os.utime(target)
+                return target
+
+            self.evict(self.get_size(source), target)
+
+            temporary = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            try:
+                if source.is_dir():
+                    shutil.copytree(source, temporary)
+                else:
+                    shutil.copyfile(source, temporary)
+
+                if verify is not None and not verify(temporary):
+                    raise ValueError(
+                        f"The copy of {source} does not match the original."
+                    )
+
+                os.replace(temporary, target)
+            finally:
+                self.remove(temporary)
+
+        return target
+
+    def evict(self, size: int, keep: Path) -> None:
+        """
+        Remove the least recently used copies until a new one of the given size fits in the cache.
+        Copies being written or used by another job are kept, even if the cache stays over its size.
+
+        Raises:
+            ValueError: If the new copy is larger than the cache.
+        """
+
+        if self.max_size is None:
+            return
+
+        if size > self.max_size:
+            raise ValueError(
+                f"{size} bytes do not fit in the cache of {self.max_size} bytes."
+            )
+
+        copies = sorted(
+            (
+                path
+                for path in self.directory.iterdir()
+                if path.suffix not in (".lock", ".tmp", ".users") and path != keep
+            ),
+            key=lambda path: path.stat().st_mtime,
+        )
+        used = sum(self.get_size(path) for path in copies)
+
+        for path in copies:
+            if used + size <= self.max_size:
+                break
+
+            try:
+                with FileLock(self.directory / f"{path.name}.lock", timeout=0):
+                    if self.is_used(path):
+                        continue
+
+                    used -= self.get_size(path)
+                    self.remove(path)
+            except Timeout:
+                continue
+
+    def add_user(self, path: Path, user: int) -> None:
+        """
+        Register a process using a copy, identified by its pid and its start time so a reused pid is not mistaken for it.
+        """
+
+        users = path.with_name(f"{path.name}.users")
+        users.mkdir(exist_ok=True)
+        (users / str(user)).write_text(get_process_start(user) or "")
+
+    def is_used(self, path: Path) -> bool:
+        """
+        Check whether a process using a copy still runs, forgetting the ended ones.
+        """
+
+        users = path.with_name(f"{path.name}.users")
+        if not users.is_dir():
+            return False
+
+        used = False
+        for user in users.iterdir():
+            start = get_process_start(int(user.name))
+            if start is not None and start == user.read_text():
+                used = True
+            else:
+                user.unlink(missing_ok=True)
+
+        return used
+
+    def get_size(self, path: Path) -> int:
+        """
+        Get the size of a file or folder, in bytes.
+        """
+
+        if path.is_dir():
+            return sum(
+                file.stat().st_size for file in path.rglob("*") if file.is_file()
+            )
+
+        return path.stat().st_size
+
+    def remove(self, path: Path) -> None:
+        """
+        Remove a file or folder, if it exists.
+        """
+
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+        shutil.rmtree(path.with_name(f"{path.name}.users"), ignore_errors=True)
+
+    @staticmethod
+    def get_digest(path: Path) -> str:
+        """
+        Get the sha256 digest of a file.
+        """
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
@@ -1,4 +1,5 @@
-from typing import List
+from pathlib import Path
+from typing import List, Optional
 import typer
 import inquirer
 from typing_extensions import Annotated
@@ -12,14 +13,9 @@ os.environ["HF_ALLOW_CODE_EVAL"] = "1"
 app = typer.Typer()
 
 
-@app.command()
-def run(
-    model: Annotated[str, typer.Option("--model", "-m")] = "",
-    tasks: Annotated[List[Task], typer.Option("--task", "-t")] = [],
-    slurm: bool = False,
-):
+def prompt_run(model: str, tasks: List[Task]) -> tuple[str, List[Task]]:
     """
-    Run the benchmark.
+    Prompt for the model and the tasks of a run when they are not given.
     """
 
     if model == "":
@@ -47,24 +43,70 @@ def run(
             raise typer.BadParameter("Please select at least one task.")
         tasks = response["tasks"]
 
+    return model, tasks
+
+
+@app.command()
+def run(
+    model: Annotated[str, typer.Option("--model", "-m")] = "",
+    tasks: Annotated[List[Task], typer.Option("--task", "-t")] = [],
+    slurm: bool = False,
+    server: bool = False,
+    cache: bool = True,
+):
+    """
+    Run the benchmark.
+    """
+
+    model, tasks = prompt_run(model, tasks)
+
     services.run(
         model,
         tasks,
         run_config=services.get_run_config(),
         benchmark_config=services.get_benchmark_config(),
         slurm_config=services.get_slurm_config() if slurm else None,
+        server=server,
+        cache=cache,
+    )
+
+
+@app.command()
+def plan(
+    model: Annotated[str, typer.Option("--model", "-m")] = "",
+    tasks: Annotated[List[Task], typer.Option("--task", "-t")] = [],
+    slurm: bool = False,
+    server: bool = False,
+    cache: bool = True,
+):
+    """
+    Show the jobs of a run and its estimated run time, without running it.
+    """
+
+    model, tasks = prompt_run(model, tasks)
+
+    services.plan(
+        model,
+        tasks,
+        run_config=services.get_run_config(),
+        benchmark_config=services.get_benchmark_config(),
+        slurm_config=services.get_slurm_config() if slurm else None,
+        server=server,
+        cache=cache,
     )
 
 
 @app.command()
 def setup(
     definitions: Annotated[List[Benchmark], typer.Option("--definition", "-d")] = [],
+    workers: Annotated[int, typer.Option("--workers", "-w")] = 2,
 ):
     """
     Setup the environment.
 
     Args:
         definitions (List[Benchmarks]): List of images to build.
+        workers (int): Maximum number of images built concurrently.
     """
 
     if definitions == []:
@@ -83,7 +125,10 @@ def setup(
             raise typer.Exit()
         definitions = response["images"]
 
-    services.setup(definitions, run_config=services.get_run_config())
+    if not services.setup(
+        definitions, run_config=services.get_run_config(), workers=workers
+    ):
+        raise typer.Exit(code=1)
 
 
 @app.command()
@@ -95,6 +140,22 @@ def config():
     services.gen_config()
 
 
+@app.command()
+def results(
+    models: Annotated[List[str], typer.Option("--model", "-m")] = [],
+    tasks: Annotated[List[str], typer.Option("--task", "-t")] = [],
+    metrics: Annotated[List[str], typer.Option("--metric")] = [],
+    run_ids: Annotated[List[str], typer.Option("--run")] = [],
+    pivot: bool = False,
+    csv: Annotated[Optional[Path], typer.Option("--csv")] = None,
+):
+    """
+    Query the results of all the runs.
+    """
+
+    services.results(models, tasks, metrics, run_ids, pivot, csv)
+
+
 @app.command()
 def list():
     """
@@ -126,5 +187,156 @@ def save(
     )
 
 
+@app.command(hidden=True)
+def export(
+    run_id: str,
+):
+    """
+    Write the per-run JSON file of the results of a run.
+    """
+
+    services.export(run_id)
+
+
+@app.command(hidden=True)
+def restore(
+    run_id: str,
+    task: Task,
+    model: str,
+    cache_key: str,
+):
+    """
+    Store the results of a task from the result cache into a run.
+    """
+
+    services.restore(
+        run_id,
+        model,
+        task,
+        cache_key,
+        run_config=services.get_run_config(),
+        benchmark_config=services.get_benchmark_config(),
+        slurm_config=services.get_slurm_config(),
+    )
+
+
+@app.command(hidden=True)
+def wait_server(
+    run_id: str,
+    url: Annotated[Optional[str], typer.Option("--url")] = None,
+):
+    """
+    Wait for the inference server of the run to be healthy.
+    """
+
+    services.wait_server(run_id, run_config=services.get_run_config(), url=url)
+
+
+@app.command(hidden=True)
+def execute(
+    run_id: str,
+):
+    """
+    Execute the job graph of a packed run inside its allocation.
+    """
+
+    if not services.execute(
+        run_id,
+        run_config=services.get_run_config(),
+        slurm_config=services.get_slurm_config(),
+    ):
+        raise typer.Exit(code=1)
+
+
+@app.command(hidden=True)
+def record_duration(
+    model: str,
+    name: str,
+    duration: float,
+):
+    """
+    Record the duration of a job in the job history.
+    """
+
+    services.record_duration(model, name, duration)
+
+
+@app.command(hidden=True)
+def take_samples(
+    pool_key: str,
+    n_samples: int,
+    path: Path,
+):
+    """
+    Write the first samples of each problem of a sample pool to a samples file.
+    """
+
+    services.take_samples(pool_key, n_samples, path)
+
+
+@app.command(hidden=True)
+def put_samples(
+    pool_key: str,
+    path: Path,
+):
+    """
+    Add the new samples of a samples file to a sample pool.
+    """
+
+    services.put_samples(pool_key, path)
+
+
+@app.command(hidden=True)
+def take_generations(
+    pool_key: str,
+    n_samples: int,
+    path: Path,
+):
+    """
+    Write the first generations of each problem of a sample pool to a bigcode-evaluation-harness generations file.
+    """
+
+    services.take_generations(pool_key, n_samples, path)
+
+
+@app.command(hidden=True)
+def put_generations(
+    pool_key: str,
+    path: Path,
+    start: int,
+):
+    """
+    Add the new generations of a bigcode-evaluation-harness generations file, generated with the seed start, to a sample pool.
+    """
+
+    services.put_generations(pool_key, path, start)
+
+
+@app.command(hidden=True)
+def stage_image(
+    image_path: Path,
+    directory: Path,
+):
+    """
+    Copy an image to the local storage of the node and print the path of the image to run.
+    """
+
+    typer.echo(services.stage_image(image_path, directory))
+
+
+@app.command(hidden=True)
+def stage_model(
+    model: Path,
+    directory: Path,
+    max_size: Annotated[Optional[int], typer.Option("--max-size")] = None,
+    user: Annotated[Optional[int], typer.Option("--user")] = None,
+):
+    """
+    Copy a model to the local storage of the node and print the path of the model to load.
+    """
+
+    typer.echo(services.stage_model(model, directory, max_size, user))
+
+
 if __name__ == "__main__":
     app()
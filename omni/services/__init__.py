@@ -1,4 +1,5 @@
 from omni.services.run import run
+from omni.services.plan import plan
 from omni.services.setup import setup
 from omni.services.config import (
     get_run_config,
@@ -6,14 +7,39 @@ from omni.services.config import (
     gen_config,
     get_benchmark_config,
 )
-from omni.services.save import save
+from omni.services.save import save, export
+from omni.services.results import results
+from omni.services.restore import restore
+from omni.services.server import wait_server
+from omni.services.execute import execute
+from omni.services.pool import (
+    take_samples,
+    put_samples,
+    take_generations,
+    put_generations,
+)
+from omni.services.stage import stage_image, stage_model
+from omni.services.history import record_duration
 
 __all__ = [
     "run",
+    "plan",
     "setup",
     "get_run_config",
     "get_benchmark_config",
     "get_slurm_config",
     "gen_config",
     "save",
+    "export",
+    "results",
+    "restore",
+    "wait_server",
+    "execute",
+    "take_samples",
+    "put_samples",
+    "take_generations",
+    "put_generations",
+    "stage_image",
+    "stage_model",
+    "record_duration",
 ]
@@ -0,0 +1,28 @@
+from omni.benchmarks import JobHistory, PackedJobExecutor, ResultCache
+from omni.utils.schemas import JobGraph, RunConfig, SlurmConfig
+
+
+def execute(run_id: str, run_config: RunConfig, slurm_config: SlurmConfig) -> bool:
+    """
+    Execute the job graph of a packed run, from inside its allocation, longest critical path first.
+
+    Args:
+        run_id (str): The id of the run.
+        run_config (RunConfig): Information related to the run.
+        slurm_config (SlurmConfig): SLURM information.
+
+    Returns:
+        bool: Whether all the jobs succeeded.
+    """
+
+    with open(f"results/temp/{run_id}/graph.json", "r") as f:
+        graph = JobGraph.model_validate_json(f.read())
+
+    # The jobs were instrumented when planned, the history is only read to prioritize them
+    priorities = graph.get_priorities(JobHistory().estimate(graph))
+
+    try:
+        return PackedJobExecutor(graph, run_config, slurm_config, priorities).run()
+    finally:
+        # Entries of failed tasks are given back so that other runs can compute them
+        ResultCache().release(run_id)
@@ -0,0 +1,14 @@
+from omni.benchmarks import JobHistory
+
+
+def record_duration(model: str, name: str, duration: float) -> None:
+    """
+    Record the duration of a job in the job history.
+
+    Args:
+        model (str): The model of the run.
+        name (str): The name of the job.
+        duration (float): The duration of the job, in seconds.
+    """
+
+    JobHistory().record(model, name, duration)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+from typing import List, Union
+from omni.utils.schemas import RunConfig, SlurmConfig, BenchmarkConfig, JobGraph
+from omni.utils.enums import Task, Benchmark
+from omni.utils.functions import get_visible_gpus
+from omni.utils.maps import benchmark_map, task_map
+from omni.benchmarks import InferenceServer, JobHistory, ResultCache
+from collections import defaultdict
+from rich import print
+from rich.table import Table
+from uuid import uuid4
+
+
+def build_plan(
+    model: str,
+    tasks: List[Task],
+    run_config: RunConfig,
+    benchmark_config: BenchmarkConfig,
+    slurm_config: Union[None, SlurmConfig] = None,
+    server: bool = False,
+    cache: Union[None, ResultCache] = None,
+    claim: bool = False,
+) -> JobGraph:
+    """
+    Build the job graph of a run, without executing anything.
+    Tasks whose results are in the result cache are not computed again, the ones being computed by another run are waited for.
+
+    Args:
+        model (str): The model name or path.
+        tasks (List[Task]): The list of tasks to run.
+        run_config (RunConfig): Information related to the run.
+        benchmark_config (BenchmarkConfig): Information related to the benchmarks.
+        slurm_config (Union[None, dict]): SLURM information if applicable.
+        server (bool): Whether to share a single inference server between all the benchmarks.
+        cache (Union[None, ResultCache]): The result cache, None to compute every task.
+        claim (bool): Whether to claim the cache entries computed by the run.
+
+    Returns:
+        JobGraph: The jobs of the run.
+    """
+
+    run_id = str(uuid4())
+    slurm = slurm_config is not None
+
+    tasks_map = {task: task_map[task] for task in tasks}
+
+    tasks_group = defaultdict(list)
+    for key, val in sorted(tasks_map.items()):
+        tasks_group[val].append(key)
+
+    frameworks: dict[Benchmark, type] = {}
+
+    for key, val in dict(tasks_group).items():
+        frameworks[key] = benchmark_map[key](
+            run_id, run_config, benchmark_config, slurm_config
+        )
+
+        if frameworks[key].needs_parameters:
+            print(
+                f"[blue]------------------------ {key} parameters : {','.join(val)} ------------------------[blue]"
+            )
+
+            frameworks[key].get_parameters()
+
+    graph = JobGraph(run_id=run_id, model=model)
+    computed: dict[Benchmark, List[Task]] = defaultdict(list)
+    pending: dict[Task, str] = {}
+
+    for key, val in dict(tasks_group).items():
+        for task in val:
+            if cache is None:
+                computed[key].append(task)
+                continue
+
+            cache_key = frameworks[key].get_cache_key(model, task, server)
+            status = (
+                cache.claim(cache_key, run_id)
+                if claim
+                else cache.get_status(cache_key, run_id)
+            )
+
+            if status == "hit":
+                graph.cached[task] = cache_key
+            elif status == "pending":
+                pending[task] = cache_key
+            else:
+                graph.cache_keys[task] = cache_key
+                computed[key].append(task)
+
+    inference_server = None
+    if server and computed:
+        inference_server = InferenceServer(run_id, run_config, slurm_config)
+        inference_server.graph = graph
+        inference_server.start(model)
+
+    for key, val in dict(computed).items():
+        frameworks[key].server = inference_server
+        frameworks[key].graph = graph
+        frameworks[key].run_group(model, val, slurm)
+
+    for task, cache_key in pending.items():
+        graph.add(
+            f"uv run omni restore {run_id} {task} {model} {cache_key}",
+            "cpu",
+            name=f"{task}/restore",
+        )
+
+    return graph
+
+
+def estimate_run_time(
+    graph: JobGraph,
+    durations: dict[str, float],
+    run_config: RunConfig,
+    slurm_config: Union[None, SlurmConfig] = None,
+) -> float:
+    """
+    Estimate the total run time of a job graph in the execution mode of the run.
+    SLURM jobs are assumed to never wait for resources, local jobs share the GPU slots and CPU workers of the machine.
+
+    Returns:
+        float: The estimated run time, in seconds.
+    """
+
+    if slurm_config is not None:
+        return graph.estimate_makespan(durations)
+
+    if not run_config.local.concurrent:
+        return sum(durations[job.id] for job in graph.jobs if not job.service)
+
+    gpus = run_config.local.gpus
+    if gpus is None:
+        gpus = get_visible_gpus()
+
+    return graph.estimate_makespan(
+        durations,
+        gpu_slots=max(len(gpus) // run_config.tensor_parallel_size, 1),
+        cpu_slots=run_config.local.cpu_workers,
+    )
+
+
+def plan(
+    model: str,
+    tasks: List[Task],
+    run_config: RunConfig,
+    benchmark_config: BenchmarkConfig,
+    slurm_config: Union[None, SlurmConfig] = None,
+    server: bool = False,
+    cache: bool = True,
+) -> None:
+    """
+    Show the jobs of a run, in submission order, with their estimated durations and the estimated run time.
+
+    Args:
+        model (str): The model name or path.
+        tasks (List[Task]): The list of tasks to run.
+        run_config (RunConfig): Information related to the run.
+        benchmark_config (BenchmarkConfig): Information related to the benchmarks.
+        slurm_config (Union[None, dict]): SLURM information if applicable.
+        server (bool): Whether to share a single inference server between all the benchmarks.
+        cache (bool): Whether to reuse the results stored in the result cache.
+    """
+
+    graph = build_plan(
+        model,
+        tasks,
+        run_config,
+        benchmark_config,
+        slurm_config,
+        server,
+        ResultCache() if cache else None,
+    )
+    durations = JobHistory().estimate(graph)
+    priorities = graph.get_priorities(durations)
+
+    table = Table(title=f"Plan of {model}")
+    table.add_column("Id", justify="right")
+    table.add_column("Name")
+    table.add_column("Compute")
+    table.add_column("Dependencies")
+    table.add_column("Duration", justify="right")
+    table.add_column("Critical path", justify="right")
+
+    for job in graph.get_order(priorities):
+        table.add_row(
+            job.id,
+            job.name + (f" ({len(job.array)} elements)" if job.array else ""),
+            "service" if job.service else job.compute,
+            ", ".join(job.dependencies),
+            str(timedelta(seconds=round(durations[job.id]))),
+            str(timedelta(seconds=round(priorities[job.id]))),
+        )
+
+    print(table)
+
+    if graph.cached:
+        print(
+            f"[blue]------------------------ Cached : {','.join(graph.cached)} ------------------------[blue]"
+        )
+
+    run_time = estimate_run_time(graph, durations, run_config, slurm_config)
+    print(
+        f"[blue]------------------------ Estimated run time : {timedelta(seconds=round(run_time))} ------------------------[blue]"
+    )
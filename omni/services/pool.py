@@ -0,0 +1,93 @@
+from collections import defaultdict
+import json
+import os
+from pathlib import Path
+from typing import List
+from omni.benchmarks import SamplePool
+from rich import print
+
+
+def take_samples(pool_key: str, n_samples: int, path: Path) -> None:
+    """
+    Write the first samples of each problem of a sample pool to a samples file.
+
+    Args:
+        pool_key (str): The key of the sample pool.
+        n_samples (int): The number of samples of each problem to take.
+        path (Path): The samples file to write.
+    """
+
+    count = SamplePool(pool_key).take(n_samples, path)
+
+    print(f"[green]{count} samples taken from the pool {pool_key}[/green]")
+
+
+def put_samples(pool_key: str, path: Path) -> None:
+    """
+    Add the samples of a samples file missing from a sample pool.
+
+    Args:
+        pool_key (str): The key of the sample pool.
+        path (Path): The samples file, generated after taking samples from the pool.
+    """
+
+    count = SamplePool(pool_key).put(path)
+
+    print(f"[green]{count} samples added to the pool {pool_key}[/green]")
+
+
+def take_generations(pool_key: str, n_samples: int, path: Path) -> None:
+    """
+    Write the first generations of each problem of a sample pool to a bigcode-evaluation-harness generations file,
+    holding the list of the generations of each problem, in the order of the problems.
+
+    Args:
+        pool_key (str): The key of the sample pool.
+        n_samples (int): The number of generations of each problem to take.
+        path (Path): The generations file to write.
+    """
+
+    generations: dict[int, List[str]] = defaultdict(list)
+    for record in SamplePool(pool_key).read(n_samples):
+        generations[record["task_id"]].append(record["generation"])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temporary, "w") as file:
+        json.dump(
+            [
+                generations[problem]
+                for problem in range(max(generations, default=-1) + 1)
+            ],
+            file,
+        )
+    os.replace(temporary, path)
+
+    print(
+        f"[green]{sum(map(len, generations.values()))} generations taken from the pool {pool_key}[/green]"
+    )
+
+
+def put_generations(pool_key: str, path: Path, start: int) -> None:
+    """
+    Add the new generations of a bigcode-evaluation-harness generations file to a sample pool.
+
+    Args:
+        pool_key (str): The key of the sample pool.
+        path (Path): The generations file, generated with the seed start.
+        start (int): The position of the first generation of each problem in the pool.
+    """
+
+    with open(path, "r") as file:
+        generations = json.load(file)
+
+    count = SamplePool(pool_key).add(
+        (
+            {"task_id": problem, "generation": generation}
+            for problem, samples in enumerate(generations)
+            for generation in samples
+        ),
+        start,
+    )
+
+    print(f"[green]{count} generations added to the pool {pool_key}[/green]")
@@ -0,0 +1,26 @@
+from typing import Union
+from omni.benchmarks import ResultCache
+from omni.utils.enums import Task
+from omni.utils.maps import benchmark_map, task_map
+from omni.utils.schemas import RunConfig, SlurmConfig, BenchmarkConfig
+
+
+def restore(
+    run_id: str,
+    model: str,
+    task: Task,
+    cache_key: str,
+    run_config: RunConfig,
+    benchmark_config: BenchmarkConfig,
+    slurm_config: Union[None, SlurmConfig] = None,
+):
+    """
+    Store the results of a task from the result cache into a run, waiting for them if another run is computing them.
+    """
+
+    framework = benchmark_map[task_map[task]](
+        run_id, run_config, benchmark_config, slurm_config
+    )
+
+    for result in ResultCache().wait(cache_key):
+        framework.store(model, task, result)
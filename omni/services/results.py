@@ -0,0 +1,114 @@
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Union
+from omni.benchmarks import ResultIndex
+from rich import print
+from rich.table import Table
+
+
+def get_column(row: dict[str, Any]) -> str:
+    """
+    Get the pivot column of a result: its task, metric and evaluation settings.
+    """
+
+    return " ".join(
+        [row["task"], row["metric"]]
+        + [row["subset"]] * (row["subset"] is not None)
+        + [f"t={row['temperature']}"] * (row["temperature"] is not None)
+        + [f"n={row['n_samples']}"] * (row["n_samples"] is not None)
+    )
+
+
+def pivot(rows: List[dict[str, Any]]) -> List[List[str]]:
+    """
+    Pivot results to a model by task table, keeping the most recent value of each cell.
+    Standard errors are left out, unless they were explicitly selected.
+
+    Returns:
+        List[List[str]]: The header, then one row per model.
+    """
+
+    cells: dict[str, dict[str, float]] = {}
+    columns: dict[str, None] = {}
+
+    # Rows are sorted most recent first
+    for row in rows:
+        column = get_column(row)
+        columns.setdefault(column)
+        cells.setdefault(row["model"], {}).setdefault(column, row["value"])
+
+    return [["model", *sorted(columns)]] + [
+        [model]
+        + [
+            f"{values[column]:.4f}" if column in values else ""
+            for column in sorted(columns)
+        ]
+        for model, values in sorted(cells.items())
+    ]
+
+
+def results(
+    models: List[str] = [],
+    tasks: List[str] = [],
+    metrics: List[str] = [],
+    run_ids: List[str] = [],
+    pivot_table: bool = False,
+    csv_path: Union[None, Path] = None,
+) -> None:
+    """
+    Query the results of all the runs, through an index updated with the results written since the last query.
+
+    Args:
+        models (List[str]): The models to keep, `*` wildcards are accepted.
+        tasks (List[str]): The tasks to keep, `*` wildcards are accepted.
+        metrics (List[str]): The metrics to keep, `*` wildcards are accepted.
+        run_ids (List[str]): The runs to keep, `*` wildcards are accepted.
+        pivot_table (bool): Whether to show a model by task table of the most recent results.
+        csv_path (Union[None, Path]): The CSV file to export the results to, instead of showing them.
+    """
+
+    index = ResultIndex()
+    index.update()
+    rows = index.query(models, tasks, metrics, run_ids)
+
+    if pivot_table:
+        if not metrics:
+            rows = [row for row in rows if "stderr" not in row["metric"]]
+        table = pivot(rows)
+    else:
+        columns = [
+            "run_id",
+            "model",
+            "task",
+            "metric",
+            "value",
+            "temperature",
+            "n_samples",
+            "subset",
+            "timestamp",
+        ]
+        table = [columns] + [
+            [
+                datetime.fromtimestamp(row[column]).isoformat(timespec="seconds")
+                if column == "timestamp"
+                else ("" if row[column] is None else str(row[column]))
+                for column in columns
+            ]
+            for row in rows
+        ]
+
+    if csv_path is not None:
+        with open(csv_path, "w", newline="") as file:
+            csv.writer(file).writerows(table)
+
+        print(f"[green]{len(table) - 1} rows written to {csv_path}[/green]")
+        return
+
+    output = Table()
+    for column in table[0]:
+        output.add_column(column)
+    for row in table[1:]:
+        output.add_row(*row)
+
+    print(output)
@@ -1,10 +1,21 @@
+from datetime import timedelta
+import json
+from pathlib import Path
 from typing import List, Union
 from omni.utils.schemas import RunConfig, SlurmConfig, BenchmarkConfig
-from omni.utils.enums import Task, Benchmark
-from omni.utils.maps import benchmark_map, task_map
-from collections import defaultdict
+from omni.utils.enums import Task
+from omni.benchmarks import (
+    JobHistory,
+    JobRunner,
+    LocalJobExecutor,
+    ResultCache,
+    SequentialJobExecutor,
+    SlurmJobExecutor,
+)
+from omni.services.plan import build_plan, estimate_run_time
+from omni.services.restore import restore
+from omni.services.save import export
 from rich import print
-from uuid import uuid4
 
 
 def run(
@@ -13,46 +24,115 @@ def run(
     run_config: RunConfig,
     benchmark_config: BenchmarkConfig,
     slurm_config: Union[None, SlurmConfig] = None,
+    server: bool = False,
+    cache: bool = True,
 ) -> None:
     """
     Run the benchmark.
+    The job graph of the run is planned first, then executed or submitted longest critical path first.
+    Tasks already computed by a previous run with the same model, parameters, configuration and images are taken from the result cache.
 
     Args:
         model (str): The model name or path.
         tasks (List[Task]): The list of tasks to run.
         run_config (RunConfig): Information related to the run.
         slurm_config (Union[None, dict]): SLURM information if applicable.
+        server (bool): Whether to share a single inference server between all the benchmarks.
+        cache (bool): Whether to reuse the results stored in the result cache.
     """
 
-    run_id = str(uuid4())
+    result_cache = ResultCache() if cache else None
+    graph = build_plan(
+        model,
+        tasks,
+        run_config,
+        benchmark_config,
+        slurm_config,
+        server,
+        result_cache,
+        claim=True,
+    )
+    run_id = graph.run_id
 
-    tasks_map = {task: task_map[task] for task in tasks}
+    Path(f"results/temp/{run_id}").mkdir(parents=True, exist_ok=True)
+    with open(f"results/temp/{run_id}/cache.json", "w") as file:
+        json.dump(graph.cache_keys, file, indent=4)
 
-    tasks_group = defaultdict(list)
-    for key, val in sorted(tasks_map.items()):
-        tasks_group[val].append(key)
+    for task, cache_key in graph.cached.items():
+        print(
+            f"[blue]------------------------ Restoring {task} from cache ------------------------[blue]"
+        )
 
-    frameworks: dict[Benchmark, type] = {}
+        restore(run_id, model, task, cache_key, run_config, benchmark_config)
 
-    for key, val in dict(tasks_group).items():
-        frameworks[key] = benchmark_map[key](
-            run_id, run_config, benchmark_config, slurm_config
+    if not graph.jobs:
+        export(run_id)
+        print(
+            "[green bold]------------------------ All tasks completed ------------------------[green bold]"
         )
+        return
 
-        if frameworks[key].needs_parameters:
-            print(
-                f"[blue]------------------------ {key} parameters : {','.join(val)} ------------------------[blue]"
-            )
+    # The per-run JSON file is written once all the results are stored, even if some tasks failed
+    graph.add(
+        f"uv run omni export {run_id}",
+        "cpu",
+        [f"afterany:{job.id}" for job in graph.jobs if not job.service],
+        name="export",
+    )
 
-            frameworks[key].get_parameters()
+    history = JobHistory()
+    durations = history.estimate(graph)
+    priorities = graph.get_priorities(durations)
+    history.instrument(graph)
 
-    for key, val in dict(tasks_group).items():
-        for task in val:
-            print(
-                f"[blue]------------------------ Running {task} ------------------------[blue]"
-            )
+    run_time = estimate_run_time(graph, durations, run_config, slurm_config)
+    print(
+        f"[blue]------------------------ Running {len(graph.jobs)} jobs, estimated run time : {timedelta(seconds=round(run_time))} ------------------------[blue]"
+    )
+
+    succeeded = True
 
-            frameworks[key].run(model, task, slurm_config is not None)
+    if slurm_config is None:
+        try:
+            if run_config.local.concurrent:
+                succeeded = LocalJobExecutor(graph, run_config, priorities).run()
+            else:
+                succeeded = SequentialJobExecutor(graph, priorities).run()
+        finally:
+            # Entries of failed tasks are given back so that other runs can compute them
+            if result_cache is not None:
+                result_cache.release(run_id)
+    elif slurm_config.packed is not None:
+        print(
+            "[blue]------------------------ Submitting packed allocation ------------------------[blue]"
+        )
+
+        graph_file = Path(f"results/temp/{run_id}/graph.json")
+        graph_file.parent.mkdir(parents=True, exist_ok=True)
+        graph_file.write_text(graph.model_dump_json(indent=4))
+
+        job_id = JobRunner(run_id, run_config, slurm_config).exec(
+            f"uv run omni execute {run_id}",
+            slurm=True,
+            slurm_compute="packed",
+        )
+
+        if result_cache is not None:
+            result_cache.hand_over(run_id, [job_id])
+    else:
+        executor = SlurmJobExecutor(graph, run_config, slurm_config, priorities)
+        try:
+            succeeded = executor.run()
+        finally:
+            # The claims outlive this process, they are kept as long as the submitted jobs are in the queue
+            if result_cache is not None:
+                result_cache.hand_over(run_id, list(executor.slurm_ids.values()))
+
+    if not succeeded:
+        print(
+            "[red bold]------------------------ Some tasks failed ------------------------[red bold]"
+        )
+        return
 
     print(
         "[green bold]------------------------ All tasks completed ------------------------[green bold]"
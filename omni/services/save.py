@@ -1,8 +1,10 @@
+import json
+import os
 from typing import Union
+from omni.benchmarks import ResultCache, ResultStore
 from omni.utils.enums import Task
 from omni.utils.maps import benchmark_map, task_map
 from omni.utils.schemas import RunConfig, SlurmConfig, BenchmarkConfig
-from filelock import FileLock
 
 
 def save(
@@ -15,11 +17,37 @@ def save(
 ):
     """
     Save the results of the benchmark.
+    When the run claimed the result cache entry of the task, the results are stored in the cache as well.
     """
 
     framework = benchmark_map[task_map[task]](
         run_id, run_config, benchmark_config, slurm_config
     )
 
-    with FileLock(f"results/temp/{run_id}/.lock"):
-        framework.save(model, task)
+    framework.save(model, task)
+
+    keys_file = f"results/temp/{run_id}/cache.json"
+    if not os.path.exists(keys_file):
+        return
+
+    with open(keys_file, "r") as file:
+        cache_key = json.load(file).get(task)
+
+    results = ResultStore(run_id).load().get(task)
+
+    if cache_key is not None and isinstance(results, list):
+        ResultCache().put(cache_key, results)
+
+
+def export(run_id: str) -> None:
+    """
+    Write the per-run JSON file of the results from the results log of the run.
+    The export runs once all the jobs of the run ended, so the cache entries the run claimed but never stored,
+    its failed tasks, are given back for other runs to compute them.
+
+    Args:
+        run_id (str): The id of the run.
+    """
+
+    ResultStore(run_id).export()
+    ResultCache().release(run_id)
@@ -0,0 +1,23 @@
+from typing import Union
+from omni.benchmarks import InferenceServer
+from omni.utils.functions import wait_for_server
+from omni.utils.schemas import RunConfig
+
+
+def wait_server(
+    run_id: str, run_config: RunConfig, url: Union[None, str] = None
+) -> None:
+    """
+    Wait until the inference server of the run is healthy.
+
+    Args:
+        run_id (str): The id of the run.
+        run_config (RunConfig): Information related to the run.
+        url (Union[None, str]): The url of a server started by a job itself, instead of the shared one.
+    """
+
+    if url is not None:
+        wait_for_server(url, run_config.server.startup_timeout)
+        return
+
+    InferenceServer(run_id, run_config, None).wait()
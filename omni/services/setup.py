@@ -1,50 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import json
+import os
 from pathlib import Path
 import subprocess
+from typing import List
 from rich import print
+from omni.benchmarks import ImageManifest
 from omni.utils.schemas import RunConfig
 
 
-def setup(definitions: list, run_config: RunConfig) -> None:
+def get_build_hash(def_file: Path, args: List[str]) -> str:
+    """
+    Get the hash of the build of an image, from its definition file and the build arguments.
+    """
+
+    return hashlib.sha256(
+        json.dumps({"definition": def_file.read_text(), "args": args}).encode()
+    ).hexdigest()
+
+
+def get_image_digest(image_path: Path) -> str:
+    """
+    Get the digest of a built image.
+    """
+
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def build_image(
+    def_file: Path, image_path: Path, args: List[str], cache_directory: Path
+) -> str:
+    """
+    Build an image next to its destination, then replace the previous one, so it stays usable during the build.
+    The output of the build is written to its own log file, builds running concurrently.
+
+    Returns:
+        str: The digest of the built image.
+    """
+
+    temporary = image_path.with_name(f"{image_path.stem}.build.sif")
+    temporary.unlink(missing_ok=True)
+
+    log = Path("logs") / f"setup-{image_path.stem}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+
+    # The layers pulled by the builds are shared through the cache of the container system
+    env = os.environ.copy()
+    env[f"{args[0].upper()}_CACHEDIR"] = str(cache_directory.absolute())
+
+    with open(log, "w") as output:
+        subprocess.run(
+            [*args, str(temporary), str(def_file)],
+            check=True,
+            env=env,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+
+    digest = get_image_digest(temporary)
+    os.replace(temporary, image_path)
+
+    return digest
+
+
+def setup(definitions: list, run_config: RunConfig, workers: int = 2) -> bool:
     """
     Setup the environment.
+    Only the images whose definition file or build arguments changed since they were built are built again,
+    independent builds running concurrently. The hash and the digest of each built image are recorded in the manifest
+    of the images directory.
 
     Args:
         definitions (List[str]): List of images to build.
         run_config (RunConfig): Information related to the run.
+        workers (int): The maximum number of concurrent builds.
+
+    Returns:
+        bool: Whether all the builds succeeded.
     """
 
     # Create the directory if it doesn't exist
     run_config.images_directory.mkdir(parents=True, exist_ok=True)
+    manifest = ImageManifest(run_config.images_directory)
+    args = [run_config.container_system.value, "build"]
 
+    builds: dict[Path, Path] = {}
     for image in definitions:
         # Check all def files that start with the image name
-        def_files = list(Path("omni/definitions").glob(f"{image}*.def"))
-
-        for def_file in def_files:
-            # Check if the definition file exists
-            if not def_file.exists():
-                print(f"[red]Definition file {def_file} does not exist.[/red]")
-                continue
-
-            # Check if the image already exists
+        for def_file in sorted(Path("omni/definitions").glob(f"{image}*.def")):
             image_path = Path(run_config.images_directory) / def_file.name.replace(
                 ".def", ".sif"
             )
-            if image_path.exists():
-                print(f"[green]Image {image_path.name} already exists.[/green]")
+
+            record = manifest.get(image_path.stem)
+            if (
+                image_path.exists()
+                and record is not None
+                and record["hash"] == get_build_hash(def_file, args)
+            ):
+                print(f"[green]Image {image_path.name} is up to date.[/green]")
                 continue
 
-            # Build the image
-            subprocess.run(
-                [
-                    run_config.container_system.value,
-                    "build",
-                    str(image_path),
-                    str(def_file),
-                ],
-                check=True,
-            )
+            builds[def_file] = image_path
+
+    if builds:
+        print(
+            f"[blue]------------------------ Building {', '.join(image_path.stem for image_path in builds.values())} ------------------------[blue]"
+        )
+
+    success = True
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {
+            executor.submit(
+                build_image,
+                def_file,
+                image_path,
+                args,
+                run_config.images_directory / ".cache",
+            ): (def_file, image_path)
+            for def_file, image_path in builds.items()
+        }
+
+        for future in as_completed(futures):
+            def_file, image_path = futures[future]
 
-            print(
-                f"[green]Image {def_file.name.replace('.def', '')} built successfully.[/green]"
+            try:
+                digest = future.result()
+            except subprocess.CalledProcessError:
+                success = False
+                print(
+                    f"[red]Image {image_path.stem} failed to build, see logs/setup-{image_path.stem}.log[/red]"
+                )
+                continue
+            except Exception as error:
+                # Such as a missing container system or a full disk, the other builds are still recorded
+                success = False
+                print(f"[red]Image {image_path.stem} failed to build: {error}[/red]")
+                continue
+
+            manifest.put(
+                image_path.stem,
+                get_build_hash(def_file, args),
+                digest,
+                ImageManifest.get_identity(image_path),
             )
+            print(f"[green]Image {image_path.stem} built successfully.[/green]")
+
+    return success
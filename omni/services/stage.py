@@ -0,0 +1,86 @@
+import hashlib
+from pathlib import Path
+from typing import Union
+import typer
+from omni.benchmarks import ImageManifest, NodeCache
+from omni.utils.functions import get_model_fingerprint
+
+
+def stage_image(image_path: Path, directory: Path) -> Path:
+    """
+    Copy an image to the local storage of the node, reusing the copy of a previous job when the node holds it.
+    The copy is keyed by the size, modification time and inode of the image, so an image replaced in any way,
+    even outside `omni setup`, is copied again. It is checked against the digest recorded by `omni setup`
+    when the image is still the one it built. The image of the shared filesystem is used when it cannot be staged.
+
+    Args:
+        image_path (Path): The image of the images directory.
+        directory (Path): The directory of the node holding the staged files.
+
+    Returns:
+        Path: The image to run.
+    """
+
+    try:
+        identity = ImageManifest.get_identity(image_path)
+        record = ImageManifest(image_path.parent).get(image_path.stem)
+        digest = (
+            record["digest"]
+            if record is not None and record.get("identity") == identity
+            else None
+        )
+
+        return NodeCache(directory / "images").stage(
+            image_path,
+            f"{image_path.stem}-{hashlib.sha256(identity.encode()).hexdigest()[:16]}",
+            (lambda copy: NodeCache.get_digest(copy) == digest) if digest else None,
+        )
+    except (OSError, ValueError) as error:
+        typer.echo(f"Image {image_path.name} not staged: {error}", err=True)
+        return image_path
+
+
+def stage_model(
+    model: Path,
+    directory: Path,
+    max_size: Union[None, int],
+    user: Union[None, int] = None,
+) -> Path:
+    """
+    Copy the folder of a model to the local storage of the node, reusing the copy of a previous job when the node holds it.
+    The copy is checked against the fingerprint of the model, and the least recently used models are evicted
+    to keep the cache under its size. The model of the shared filesystem is used when it cannot be staged.
+
+    Args:
+        model (Path): The folder of the model.
+        directory (Path): The directory of the node holding the staged files.
+        max_size (Union[None, int]): The maximum size of the staged models, in GiB.
+        user (Union[None, int]): The process of the job loading the model, the copy is not evicted while it runs.
+
+    Returns:
+        Path: The folder of the model to load.
+    """
+
+    cache = NodeCache(
+        directory / "models", max_size * 1024**3 if max_size is not None else None
+    )
+    fingerprint = get_model_fingerprint(str(model))
+
+    def verify(copy: Path) -> bool:
+        # The copy is fingerprinted once, so its digests are not kept in the index of the shared files
+        index_path = copy.with_name(f"{copy.name}.fingerprints.tmp")
+        try:
+            return get_model_fingerprint(str(copy), index_path) == fingerprint
+        finally:
+            index_path.unlink(missing_ok=True)
+
+    try:
+        return cache.stage(
+            model,
+            f"{model.name}-{hashlib.sha256(fingerprint.encode()).hexdigest()[:16]}",
+            verify,
+            user,
+        )
+    except (OSError, ValueError) as error:
+        typer.echo(f"Model {model} not staged: {error}", err=True)
+        return model
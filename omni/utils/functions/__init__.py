@@ -1,3 +1,25 @@
 from omni.utils.functions.get_short_precision import get_short_precision
+from omni.utils.functions.wait_for_server import wait_for_server
+from omni.utils.functions.get_visible_gpus import get_visible_gpus
+from omni.utils.functions.get_fingerprint import (
+    get_file_fingerprint,
+    get_model_fingerprint,
+    get_tokenizer_fingerprint,
+)
+from omni.utils.functions.get_max_model_length import get_max_model_length
+from omni.utils.functions.has_chat_template import has_chat_template
+from omni.utils.functions.get_process_start import get_process_start
+from omni.utils.functions.has_active_slurm_jobs import has_active_slurm_jobs
 
-__all__ = ["get_short_precision"]
+__all__ = [
+    "get_short_precision",
+    "wait_for_server",
+    "get_visible_gpus",
+    "get_file_fingerprint",
+    "get_model_fingerprint",
+    "get_tokenizer_fingerprint",
+    "get_max_model_length",
+    "has_chat_template",
+    "get_process_start",
+    "has_active_slurm_jobs",
+]
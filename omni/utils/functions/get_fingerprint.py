@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+
+# Files defining the model besides its weights, hashed in full
+METADATA_PATTERNS = [
+    "config.json",
+    "generation_config.json",
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "tokenizer.model",
+    "special_tokens_map.json",
+    "added_tokens.json",
+    "vocab.json",
+    "vocab.txt",
+    "merges.txt",
+    "chat_template.jinja",
+    "*.index.json",
+]
+
+# Files defining the tokenizer of a model
+TOKENIZER_PATTERNS = [
+    "tokenizer.json",
+    "tokenizer_config.json",
+    "tokenizer.model",
+    "special_tokens_map.json",
+    "added_tokens.json",
+    "vocab.json",
+    "vocab.txt",
+    "merges.txt",
+    "chat_template.jinja",
+]
+
+# Weight shards, only sampled chunks of them are hashed
+WEIGHT_PATTERNS = ["*.safetensors", "*.bin", "*.pt", "*.pth", "*.gguf"]
+
+SAMPLE_SIZE = 1 << 20
+SAMPLE_COUNT = 16
+
+FINGERPRINT_INDEX = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "omni"
+    / "fingerprints.json"
+)
+
+
+def get_file_fingerprint(path: Path) -> str:
+    """
+    Get a fingerprint of a file from its size and modification time, without reading it.
+
+    Args:
+            path (Path): The file to fingerprint.
+
+    Returns:
+            str: The fingerprint, empty if the file does not exist.
+    """
+    if not path.is_file():
+        return ""
+
+    stat = path.stat()
+
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def get_file_digest(path: Path, sampled: bool, index: dict[str, Any]) -> str:
+    """
+    Get the digest of a file, memoized in the index by its path, size, modification time and inode.
+    Sampled files are hashed from evenly spaced chunks, always including the first and the last one,
+    which is enough to tell apart different checkpoints without reading hundreds of GB.
+
+    Args:
+            path (Path): The file to hash.
+            sampled (bool): Whether to only hash chunks of the file.
+            index (dict[str, Any]): The memoized digests, updated in place.
+
+    Returns:
+            str: The digest of the file.
+    """
+    stat = path.stat()
+    key = str(path.resolve())
+    identity = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    entry = index.get(key)
+    if entry is not None and entry["identity"] == identity:
+        return entry["digest"]
+
+    digest = hashlib.sha256(str(stat.st_size).encode())
+
+    with open(path, "rb") as file:
+        if not sampled or stat.st_size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            for chunk in iter(lambda: file.read(SAMPLE_SIZE), b""):
+                digest.update(chunk)
+        else:
+            step = (stat.st_size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for position in range(SAMPLE_COUNT):
+                file.seek(position * step)
+                digest.update(file.read(SAMPLE_SIZE))
+
+    index[key] = {"identity": identity, "digest": digest.hexdigest()}
+
+    return index[key]["digest"]
+
+
+def get_hub_cache(model: str) -> Path:
+    """
+    Get the folder of a model of the hub in the local Hugging Face cache.
+
+    Args:
+            model (str): The model name on the hub.
+
+    Returns:
+            Path: The folder of the model, which may not exist.
+    """
+    hub_cache = Path(
+        os.environ.get(
+            "HF_HUB_CACHE",
+            Path(os.environ.get("HF_HOME", Path.home() / ".cache" / "huggingface"))
+            / "hub",
+        )
+    )
+
+    return hub_cache / f"models--{model.replace('/', '--')}"
+
+
+def get_hub_revision(model: str) -> str:
+    """
+    Get the revision of a model of the hub from the local Hugging Face cache.
+
+    Args:
+            model (str): The model name on the hub.
+
+    Returns:
+            str: The commit of the cached model, empty if it is not cached.
+    """
+    ref = get_hub_cache(model) / "refs" / "main"
+
+    return ref.read_text().strip() if ref.is_file() else ""
+
+
+def get_model_folder(model: str) -> Union[None, Path]:
+    """
+    Get the folder holding the files of a model: its own folder, or its snapshot in the local Hugging Face cache.
+
+    Args:
+            model (str): The model name or path.
+
+    Returns:
+            Union[None, Path]: The folder of the model, None if it is not available locally.
+    """
+    path = Path(model)
+    if path.is_dir():
+        return path
+
+    revision = get_hub_revision(model)
+    if not revision:
+        return None
+
+    return get_hub_cache(model) / "snapshots" / revision
+
+
+def get_files_fingerprint(files: dict[Path, bool], index_path: Path) -> str:
+    """
+    Get a fingerprint of files from their names and digests, memoized in a local index.
+
+    Args:
+            files (dict[Path, bool]): The files to fingerprint, and whether to only hash chunks of each.
+            index_path (Path): The file memoizing the digests of the files.
+
+    Returns:
+            str: The fingerprint of the files.
+    """
+    index: dict[str, Any] = {}
+    if index_path.is_file():
+        try:
+            index = json.loads(index_path.read_text())
+        except ValueError:
+            index = {}
+
+    digest = hashlib.sha256()
+    changed = False
+
+    for file in sorted(files):
+        entry = index.get(str(file.resolve()))
+        digest.update(
+            f"{file.name}:{get_file_digest(file, files[file], index)}".encode()
+        )
+        # A new entry is created whenever the file is hashed again
+        changed = changed or index[str(file.resolve())] is not entry
+
+    if changed:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = index_path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(json.dumps(index))
+        os.replace(temporary, index_path)
+
+    return digest.hexdigest()
+
+
+def get_model_fingerprint(model: str, index_path: Path = FINGERPRINT_INDEX) -> str:
+    """
+    Get a fingerprint of a model, changing whenever its weights, configuration or tokenizer change.
+    Local models are fingerprinted from their configuration and tokenizer files, the index of their shards
+    and sampled chunks of each shard. Digests are memoized in a local index, so that only changed files are hashed again.
+    Models of the hub are fingerprinted from their name and the cached revision.
+
+    Args:
+            model (str): The model name or path.
+            index_path (Path): The file memoizing the digests of the files.
+
+    Returns:
+            str: The fingerprint of the model.
+    """
+    path = Path(model)
+    if not path.is_dir():
+        revision = get_hub_revision(model)
+        return f"{model}@{revision}" if revision else model
+
+    files = {
+        file: sampled
+        for patterns, sampled in ((METADATA_PATTERNS, False), (WEIGHT_PATTERNS, True))
+        for pattern in patterns
+        for file in path.glob(pattern)
+        if file.is_file()
+    }
+
+    return get_files_fingerprint(files, index_path)
+
+
+def get_tokenizer_fingerprint(model: str, index_path: Path = FINGERPRINT_INDEX) -> str:
+    """
+    Get a fingerprint of the tokenizer of a model, shared by the models with the same tokenizer files.
+    The files are read from the folder of a local model, or from the cached snapshot of a model of the hub.
+    When no tokenizer file is available, the fingerprint of the model is used instead.
+
+    Args:
+            model (str): The model name or path.
+            index_path (Path): The file memoizing the digests of the files.
+
+    Returns:
+            str: The fingerprint of the tokenizer.
+    """
+    path = Path(model)
+    if not path.is_dir():
+        path = get_hub_cache(model) / "snapshots" / get_hub_revision(model)
+
+    files = {
+        file: False
+        for pattern in TOKENIZER_PATTERNS
+        for file in path.glob(pattern)
+        if file.is_file()
+    }
+    if not files:
+        return get_model_fingerprint(model, index_path)
+
+    return get_files_fingerprint(files, index_path)
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Union
+from omni.utils.functions.get_fingerprint import get_model_folder
+
+
+# Configuration keys holding the maximum length of a model, the smallest one given is used
+MAX_LENGTH_KEYS = [
+    "max_position_embeddings",
+    "n_positions",
+    "max_seq_len",
+    "seq_length",
+    "max_sequence_length",
+    "max_seq_length",
+    "seq_len",
+]
+
+
+def get_model_config(model: str) -> Union[None, dict[str, Any]]:
+    """
+    Get the configuration of a model, from its folder or from the local Hugging Face cache.
+
+    Args:
+            model (str): The model name or path.
+
+    Returns:
+            Union[None, dict[str, Any]]: The content of the config.json file, None if it is not available locally.
+    """
+    folder = get_model_folder(model)
+    if folder is None:
+        return None
+
+    config = folder / "config.json"
+    if not config.is_file():
+        return None
+
+    with open(config, "r") as file:
+        return json.load(file)
+
+
+def get_max_model_length(model: str) -> Union[None, int]:
+    """
+    Get the maximum sequence length of a model from its configuration, extended by its RoPE scaling the way vLLM does.
+
+    Args:
+            model (str): The model name or path.
+
+    Returns:
+            Union[None, int]: The maximum sequence length, None if it is unknown.
+    """
+    config = get_model_config(model)
+    if config is None:
+        return None
+
+    # Multimodal models hold the configuration of their language model apart
+    config = config.get("text_config", config)
+
+    lengths = [config[key] for key in MAX_LENGTH_KEYS if config.get(key)]
+    if not lengths:
+        return None
+    length = min(lengths)
+
+    # These scalings already give the extended length in max_position_embeddings
+    scaling = config.get("rope_scaling") or {}
+    if scaling.get("factor") and scaling.get("rope_type", scaling.get("type")) not in (
+        "su",
+        "longrope",
+        "llama3",
+    ):
+        length = int(length * scaling["factor"])
+
+    return length
@@ -0,0 +1,31 @@
+import os
+from typing import Union
+
+
+def get_process_start(pid: int) -> Union[None, str]:
+    """
+    Get the start time of a process of this machine, in clock ticks since boot, so a reused pid is not mistaken for it.
+
+    Args:
+            pid (int): The id of the process.
+
+    Returns:
+            Union[None, str]: The start time, empty when unknown, None if the process does not run.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            # The name of the process, in parentheses, may hold spaces
+            return file.read().rpartition(")")[2].split()[19]
+    except FileNotFoundError:
+        return None
+    except OSError:
+        pass
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+
+    return ""
@@ -0,0 +1,28 @@
+import os
+import subprocess
+from typing import List
+
+
+def get_visible_gpus() -> List[str]:
+    """
+    Get the GPUs visible on this machine, from CUDA_VISIBLE_DEVICES or nvidia-smi.
+
+    Returns:
+            List[str]: The GPU ids, empty if no GPU is found.
+    """
+    visible_devices = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if visible_devices is not None:
+        return [device for device in visible_devices.split(",") if device.strip()]
+
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=index", "--format=csv,noheader"],
+            check=True,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return []
+
+    return [line.strip() for line in output.stdout.splitlines() if line.strip()]
@@ -0,0 +1,33 @@
+import subprocess
+from typing import List, Union
+
+
+def has_active_slurm_jobs(job_ids: List[str]) -> Union[None, bool]:
+    """
+    Check whether any of the given SLURM jobs is still pending or running.
+    Jobs pending on a dependency that failed never start, so they are not counted.
+
+    Args:
+            job_ids (List[str]): The SLURM job ids, job arrays included.
+
+    Returns:
+            Union[None, bool]: Whether a job is still in the queue, None if SLURM can not be queried.
+    """
+    try:
+        output = subprocess.run(
+            ["squeue", "--noheader", "--format=%r", f"--jobs={','.join(job_ids)}"],
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+
+    if output.returncode != 0:
+        # Jobs that left the queue are unknown to squeue, other errors leave the state of the jobs unknown
+        return False if "Invalid job id" in output.stderr else None
+
+    return any(
+        reason.strip() not in ("", "DependencyNeverSatisfied")
+        for reason in output.stdout.splitlines()
+    )
@@ -0,0 +1,28 @@
+import json
+from typing import Union
+from omni.utils.functions.get_fingerprint import get_model_folder
+
+
+def has_chat_template(model: str) -> Union[None, bool]:
+    """
+    Check whether the tokenizer of a model has a chat template, from its folder or from the local Hugging Face cache.
+
+    Args:
+            model (str): The model name or path.
+
+    Returns:
+            Union[None, bool]: Whether the model has a chat template, None if its tokenizer is not available locally.
+    """
+    folder = get_model_folder(model)
+    if folder is None or not folder.is_dir():
+        return None
+
+    if (folder / "chat_template.jinja").is_file():
+        return True
+
+    tokenizer_config = folder / "tokenizer_config.json"
+    if not tokenizer_config.is_file():
+        return None
+
+    with open(tokenizer_config, "r") as file:
+        return bool(json.load(file).get("chat_template"))
@@ -0,0 +1,45 @@
+import subprocess
+import time
+from typing import Union
+import urllib.request
+
+
+def wait_for_server(
+    url: str,
+    timeout: float,
+    process: Union[None, subprocess.Popen] = None,
+    interval: float = 5,
+) -> None:
+    """
+    Wait until an OpenAI-compatible inference server reports healthy.
+
+    Args:
+            url (str): The base url of the server (e.g., 'http://localhost:8000').
+            timeout (float): The maximum time to wait, in seconds.
+            process (Union[None, subprocess.Popen]): The server process, if started locally.
+            interval (float): The time between two health checks, in seconds.
+
+    Raises:
+            RuntimeError: If the server process exits before being healthy.
+            TimeoutError: If the server is not healthy before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(
+                f"The inference server exited with code {process.returncode} before being healthy."
+            )
+
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=interval) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+
+        time.sleep(interval)
+
+    raise TimeoutError(
+        f"The inference server at {url} was not healthy after {timeout} seconds."
+    )
@@ -1,12 +1,26 @@
 from omni.utils.schemas.run_config import RunConfig
-from omni.utils.schemas.slurm_config import SlurmConfig, SlurmJobConfig
+from omni.utils.schemas.slurm_config import (
+    SlurmConfig,
+    SlurmJobConfig,
+    SlurmPackedConfig,
+)
 from omni.utils.schemas.container_bind import ContainerBind
 from omni.utils.schemas.benchmark_config import BenchmarkConfig
+from omni.utils.schemas.server_config import ServerConfig
+from omni.utils.schemas.job_graph import Job, JobGraph
+from omni.utils.schemas.local_config import LocalConfig
+from omni.utils.schemas.staging_config import StagingConfig
 
 __all__ = [
     "RunConfig",
     "SlurmConfig",
     "SlurmJobConfig",
+    "SlurmPackedConfig",
     "ContainerBind",
     "BenchmarkConfig",
+    "ServerConfig",
+    "Job",
+    "JobGraph",
+    "LocalConfig",
+    "StagingConfig",
 ]
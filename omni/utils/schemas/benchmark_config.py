@@ -1,3 +1,4 @@
+from typing import Union
 from pydantic import BaseModel, Field
 from omni.utils.enums import Benchmark
 
@@ -7,6 +8,47 @@ class LlmEvaluationHarnessConfig(BaseModel):
         default=False,
         description="Whether to add a beginning-of-sequence token to the input text.",
     )
+    batch_tasks: bool = Field(
+        default=False,
+        description="Run all the selected tasks in a single lm_eval invocation, loading the model only once.",
+    )
+
+    def get_model_args(self) -> dict:
+        """
+        Get the configuration values forwarded to lm_eval as model arguments.
+        """
+
+        return self.model_dump(exclude={"batch_tasks"})
+
+
+class BigCodeBenchConfig(BaseModel):
+    """
+    Configuration for the BigCodeBench benchmark.
+    """
+
+    batch_generation: bool = Field(
+        default=False,
+        description="Generate the samples of all the sampling configurations in a single job, loading the model only once.",
+    )
+
+
+class BigCodeEvaluationHarnessConfig(BaseModel):
+    """
+    Configuration for the bigcode-evaluation-harness benchmark.
+    """
+
+    batch_tasks: bool = Field(
+        default=False,
+        description="Generate the samples of all the selected tasks in a single job per sampling configuration, loading the model only once.",
+    )
+    vllm_generation: bool = Field(
+        default=False,
+        description="Generate with vLLM instead of accelerate and HF transformers.",
+    )
+    max_length_generation: int = Field(
+        default=512,
+        description="Maximum length of a generation, prompt included, in tokens.",
+    )
 
 
 class RulerConfig(BaseModel):
@@ -20,6 +62,37 @@ class RulerConfig(BaseModel):
     )
 
 
+class ExecutionConfig(BaseModel):
+    """
+    Configuration of the sandboxed execution of the generated code.
+    """
+
+    parallel: Union[None, int] = Field(
+        default=None,
+        description="Number of programs executed in parallel, the CPUs allocated to the job when not set.",
+    )
+    timeout: float = Field(
+        default=1.0,
+        description="Minimum time limit of a test, in seconds.",
+    )
+    memory_limit: int = Field(
+        default=30 * 1024,
+        description="Memory limit of a program, in MiB.",
+    )
+
+    def get_parallel(self) -> str:
+        """
+        Get the number of programs executed in parallel, as a shell expression evaluated by the job from the CPUs available to it.
+        nproc follows the CPU affinity of the job, which SLURM restricts to the CPUs of the job or of the step, while
+        SLURM_CPUS_PER_TASK is inherited by the steps of a packed allocation from the whole allocation.
+        """
+
+        if self.parallel is not None:
+            return str(self.parallel)
+
+        return "$(nproc)"
+
+
 class BenchmarkConfig(BaseModel):
     """
     Configuration for the benchmark.
@@ -31,6 +104,23 @@ class BenchmarkConfig(BaseModel):
         serialization_alias=Benchmark.LLM_EVALUATION_HARNESS.value,
     )
 
+    big_code_bench: BigCodeBenchConfig = Field(
+        default_factory=BigCodeBenchConfig,
+        alias=Benchmark.BIG_CODE_BENCHMARK.value,
+        serialization_alias=Benchmark.BIG_CODE_BENCHMARK.value,
+    )
+
+    big_code_evaluation_harness: BigCodeEvaluationHarnessConfig = Field(
+        default_factory=BigCodeEvaluationHarnessConfig,
+        alias=Benchmark.BIG_CODE_EVALUATION_HARNESS.value,
+        serialization_alias=Benchmark.BIG_CODE_EVALUATION_HARNESS.value,
+    )
+
+    execution: ExecutionConfig = Field(
+        default_factory=ExecutionConfig,
+        description="Execution of the generated code by the code benchmarks.",
+    )
+
     ruler: RulerConfig = Field(
         default_factory=RulerConfig,
         alias=Benchmark.RULER.value,
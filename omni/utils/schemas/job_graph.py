@@ -0,0 +1,214 @@
+import heapq
+from typing import List, Literal, Optional, Union
+from pydantic import BaseModel, Field
+
+
+class Job(BaseModel):
+    """
+    A command of the run, along with the resources it needs and the jobs it depends on.
+    """
+
+    id: str = Field(
+        description="Identifier of the job in the graph",
+    )
+    name: str = Field(
+        default="",
+        description="Name of the job, stable across runs, e.g. 'mmlu/evaluate'",
+    )
+    command: str = Field(
+        description="Shell command of the job",
+    )
+    compute: Union[Literal["cpu"], Literal["gpu"]] = Field(
+        description="Resources needed by the job, either 'cpu' or 'gpu'",
+    )
+    dependencies: List[str] = Field(
+        default_factory=list,
+        description="Jobs this one depends on, as job ids or 'type:job_id' entries using the SLURM dependency types",
+    )
+    array: List[dict[str, str]] = Field(
+        default_factory=list,
+        description="Shell variables of each element when the job is submitted as a SLURM job array",
+    )
+    service: bool = Field(
+        default=False,
+        description="Whether the job is a long-running service, stopped once all the jobs depending on it are done",
+    )
+
+
+class JobGraph(BaseModel):
+    """
+    Plan of a run: the graph of its jobs, built by the runners before anything is executed.
+    """
+
+    run_id: str = Field(
+        description="Identifier of the run",
+    )
+    model: str = Field(
+        description="Model evaluated by the run",
+    )
+    jobs: List[Job] = Field(
+        default_factory=list,
+        description="Jobs of the graph, a job only depends on jobs added before it",
+    )
+    cache_keys: dict[str, str] = Field(
+        default_factory=dict,
+        description="Result cache key of each task computed by the run",
+    )
+    cached: dict[str, str] = Field(
+        default_factory=dict,
+        description="Result cache key of each task whose results are already stored, not computed by the run",
+    )
+
+    def add(
+        self,
+        command: str,
+        compute: Union[Literal["cpu"], Literal["gpu"]],
+        dependencies: List[str] = [],
+        array: List[dict[str, str]] = [],
+        name: str = "",
+        service: bool = False,
+    ) -> str:
+        """
+        Add a job to the graph.
+
+        Returns:
+            str: The id of the job, to be used as a dependency.
+        """
+
+        job = Job(
+            id=str(len(self.jobs)),
+            name=name,
+            command=command,
+            compute=compute,
+            dependencies=dependencies,
+            array=array,
+            service=service,
+        )
+        self.jobs.append(job)
+
+        return job.id
+
+    def get_dependents(self, job_id: str) -> List[Job]:
+        """
+        Get the jobs depending on a job, whatever the dependency type.
+        """
+
+        return [
+            job
+            for job in self.jobs
+            if any(
+                dependency.rpartition(":")[2] == job_id
+                for dependency in job.dependencies
+            )
+        ]
+
+    def get_priorities(self, durations: dict[str, float]) -> dict[str, float]:
+        """
+        Get the priority of each job: the length of the longest path from its start to the end of the run.
+        Starting the jobs with the highest priority first keeps the critical path short.
+
+        Args:
+            durations (dict[str, float]): The estimated duration of each job, in seconds.
+        """
+
+        priorities: dict[str, float] = {}
+
+        for job in reversed(self.jobs):
+            priorities[job.id] = durations.get(job.id, 0) + max(
+                (priorities[other.id] for other in self.get_dependents(job.id)),
+                default=0,
+            )
+
+        return priorities
+
+    def get_order(self, priorities: dict[str, float]) -> List[Job]:
+        """
+        Get the jobs in a submission order: each job after its dependencies, the highest priority first.
+        """
+
+        jobs = {job.id: job for job in self.jobs}
+        remaining = {
+            job.id: {dependency.rpartition(":")[2] for dependency in job.dependencies}
+            & jobs.keys()
+            for job in self.jobs
+        }
+        ready = [
+            (-priorities.get(job_id, 0), int(job_id))
+            for job_id, dependencies in remaining.items()
+            if not dependencies
+        ]
+        heapq.heapify(ready)
+        order: List[Job] = []
+
+        while ready:
+            _, index = heapq.heappop(ready)
+            job = jobs[str(index)]
+            order.append(job)
+
+            for other in self.get_dependents(job.id):
+                remaining[other.id].discard(job.id)
+                if not remaining[other.id] and other not in order:
+                    heapq.heappush(ready, (-priorities.get(other.id, 0), int(other.id)))
+
+        return order
+
+    def estimate_makespan(
+        self,
+        durations: dict[str, float],
+        gpu_slots: Optional[int] = None,
+        cpu_slots: Optional[int] = None,
+    ) -> float:
+        """
+        Estimate the total run time by simulating the execution of the graph, highest priority first.
+        Services are considered free, they last as long as the jobs using them.
+
+        Args:
+            durations (dict[str, float]): The estimated duration of each job, in seconds.
+            gpu_slots (Optional[int]): The number of GPU jobs running at the same time, unlimited by default.
+            cpu_slots (Optional[int]): The number of CPU jobs running at the same time, unlimited by default.
+
+        Returns:
+            float: The estimated run time, in seconds.
+        """
+
+        priorities = self.get_priorities(durations)
+        capacity = {"gpu": gpu_slots, "cpu": cpu_slots}
+        used = {"gpu": 0, "cpu": 0}
+        finished: dict[str, float] = {}
+        pending = sorted(self.jobs, key=lambda job: -priorities[job.id])
+        running: List[tuple] = []
+        time = 0.0
+
+        while pending or running:
+            for job in list(pending):
+                if not all(
+                    dependency.rpartition(":")[2] in finished
+                    for dependency in job.dependencies
+                ):
+                    continue
+
+                if job.service:
+                    pending.remove(job)
+                    finished[job.id] = time
+                    continue
+
+                limit = capacity[job.compute]
+                if limit is not None and used[job.compute] >= limit:
+                    continue
+
+                pending.remove(job)
+                used[job.compute] += 1
+                heapq.heappush(
+                    running, (time + durations.get(job.id, 0), int(job.id), job)
+                )
+
+            if not running:
+                if pending:
+                    raise ValueError("The job graph has unsatisfiable dependencies.")
+                break
+
+            time, _, job = heapq.heappop(running)
+            used[job.compute] -= 1
+            finished[job.id] = time
+
+        return time
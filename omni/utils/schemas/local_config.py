@@ -0,0 +1,22 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class LocalConfig(BaseModel):
+    """
+    Configuration for running benchmarks without SLURM.
+    """
+
+    concurrent: bool = Field(
+        default=False,
+        description="Run the jobs concurrently instead of one after another",
+    )
+    gpus: Optional[List[str]] = Field(
+        default=None,
+        description="GPUs available to the concurrent jobs, detected from CUDA_VISIBLE_DEVICES or nvidia-smi by default",
+    )
+    cpu_workers: int = Field(
+        default=4,
+        gt=0,
+        description="Maximum number of CPU jobs running at the same time",
+    )
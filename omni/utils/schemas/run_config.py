@@ -3,6 +3,9 @@ from typing import Optional
 from pydantic import Field, BaseModel
 from omni.utils.enums import Precision, ContainerSystem
 from omni.utils.schemas.container_bind import ContainerBind
+from omni.utils.schemas.server_config import ServerConfig
+from omni.utils.schemas.local_config import LocalConfig
+from omni.utils.schemas.staging_config import StagingConfig
 
 
 class RunConfig(BaseModel):
@@ -24,3 +27,15 @@ class RunConfig(BaseModel):
     images_directory: Path = Field(
         description="Directory containing images to include in the container",
     )
+    server: ServerConfig = Field(
+        default_factory=ServerConfig,
+        description="Shared inference server used when running with --server",
+    )
+    local: LocalConfig = Field(
+        default_factory=LocalConfig,
+        description="Execution settings used when running without SLURM",
+    )
+    staging: StagingConfig = Field(
+        default_factory=StagingConfig,
+        description="Staging of files to the local storage of the nodes",
+    )
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from omni.utils.enums import Benchmark
+
+
+class ServerConfig(BaseModel):
+    """
+    Configuration for the shared inference server.
+    """
+
+    image: str = Field(
+        default=Benchmark.LLM_EVALUATION_HARNESS.value,
+        description="Image providing vLLM, used to serve the model",
+    )
+    port: int = Field(
+        default=8000,
+        gt=0,
+        description="Port the inference server listens on",
+    )
+    startup_timeout: int = Field(
+        default=3600,
+        gt=0,
+        description="Maximum time in seconds to wait for the inference server to be healthy",
+    )
+    num_concurrent: int = Field(
+        default=32,
+        gt=0,
+        description="Number of concurrent requests sent to the inference server by each benchmark",
+    )
@@ -6,6 +6,20 @@ class SlurmJobConfig(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+class SlurmPackedConfig(BaseModel):
+    allocation: SlurmJobConfig = Field(
+        description="SLURM kwargs of the single allocation running the whole run, e.g. its GPUs and CPUs",
+    )
+    cpu: SlurmJobConfig = Field(
+        default_factory=SlurmJobConfig,
+        description="srun kwargs of the CPU job steps, which get no GPU by default",
+    )
+    gpu: SlurmJobConfig = Field(
+        default_factory=SlurmJobConfig,
+        description="srun kwargs of the GPU job steps, which get tensor_parallel_size GPUs by default",
+    )
+
+
 class SlurmConfig(BaseModel):
     cpu: SlurmJobConfig
     gpu: SlurmJobConfig
@@ -14,3 +28,11 @@ class SlurmConfig(BaseModel):
         default=None,
         description="Optional script to run before the main command in the container",
     )
+    job_arrays: bool = Field(
+        default=False,
+        description="Submit parameter sweeps as SLURM job arrays instead of one job per sweep point",
+    )
+    packed: Optional[SlurmPackedConfig] = Field(
+        default=None,
+        description="Run the whole run in a single allocation, its jobs being concurrent job steps",
+    )
@@ -0,0 +1,26 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class StagingConfig(BaseModel):
+    """
+    Configuration for staging files to the local storage of the nodes running the jobs.
+    """
+
+    images: bool = Field(
+        default=False,
+        description="Copy the images to the local storage of the node before running them, instead of reading them from the shared filesystem",
+    )
+    models: bool = Field(
+        default=False,
+        description="Copy the local models to the local storage of the node before the GPU jobs load them, instead of reading them from the shared filesystem",
+    )
+    max_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Maximum size of the staged models of a node, in GiB, the least recently used ones being evicted. Unbounded by default",
+    )
+    directory: str = Field(
+        default="${TMPDIR:-/tmp}/omni",
+        description="Directory of the node holding the staged files, expanded by the shell of the job. It must outlive the jobs for the copies to be reused",
+    )
@@ -0,0 +1,116 @@
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import pytest
+from omni.benchmarks import ResultCache
+import omni.benchmarks.cache as cache_module
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResultCache:
+    return ResultCache(tmp_path / "cache")
+
+
+def test_claim_is_exclusive_to_a_run(cache: ResultCache):
+    assert cache.claim("key", "first") == "miss"
+    assert cache.claim("key", "second") == "pending"
+    # A run claiming its own entry again still owns it
+    assert cache.claim("key", "first") == "miss"
+
+
+def test_put_stores_the_results_and_releases_the_claim(cache: ResultCache):
+    cache.claim("key", "first")
+    cache.put("key", [{"score": 1.0}])
+
+    assert cache.get("key") == [{"score": 1.0}]
+    assert not cache.get_claim("key").exists()
+    assert cache.claim("key", "second") == "hit"
+
+
+def test_release_only_gives_back_the_claims_of_the_run(cache: ResultCache):
+    cache.claim("failed", "first")
+    cache.claim("running", "second")
+    cache.release("first")
+
+    assert cache.claim("failed", "third") == "miss"
+    assert cache.claim("running", "third") == "pending"
+
+
+def get_ended_process() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_claims_of_ended_processes_can_be_taken_over(cache: ResultCache):
+    cache.claim("key", "crashed")
+    claim = json.loads(cache.get_claim("key").read_text())
+    claim["pid"] = get_ended_process()
+    cache.get_claim("key").write_text(json.dumps(claim))
+
+    assert cache.claim("key", "second") == "miss"
+
+
+def test_claims_of_unknown_owners_time_out(cache: ResultCache):
+    cache.get_claim("key").write_text("crashed")
+    assert cache.claim("key", "second") == "pending"
+
+    os.utime(cache.get_claim("key"), (0, 0))
+    assert cache.claim("key", "second") == "miss"
+
+
+def test_claims_handed_over_follow_the_slurm_jobs(
+    cache: ResultCache, monkeypatch: pytest.MonkeyPatch
+):
+    queue = {"12": True}
+    monkeypatch.setattr(
+        cache_module,
+        "has_active_slurm_jobs",
+        lambda jobs: any(queue.get(job, False) for job in jobs),
+    )
+    cache.claim("key", "first")
+    cache.hand_over("first", ["12", "13"])
+
+    assert json.loads(cache.get_claim("key").read_text()) == {
+        "run_id": "first",
+        "jobs": ["12", "13"],
+    }
+    assert cache.claim("key", "second") == "pending"
+
+    queue["12"] = False
+    assert cache.claim("key", "second") == "miss"
+
+
+def test_wait_returns_the_stored_results(cache: ResultCache):
+    cache.claim("key", "first")
+    cache.put("key", [{"score": 1.0}])
+
+    assert cache.wait("key", interval=0) == [{"score": 1.0}]
+
+
+def test_wait_fails_when_the_claim_is_released(cache: ResultCache):
+    cache.claim("key", "first")
+    cache.release("first")
+
+    with pytest.raises(RuntimeError):
+        cache.wait("key", interval=0)
+
+
+def test_wait_fails_when_the_owner_of_the_claim_ended(cache: ResultCache):
+    cache.claim("key", "first")
+    claim = json.loads(cache.get_claim("key").read_text())
+    claim["pid"] = get_ended_process()
+    cache.get_claim("key").write_text(json.dumps(claim))
+
+    with pytest.raises(RuntimeError):
+        cache.wait("key", interval=0)
+
+
+def test_wait_fails_when_the_claim_timed_out(cache: ResultCache):
+    cache.get_claim("key").write_text("first")
+    os.utime(cache.get_claim("key"), (0, 0))
+
+    with pytest.raises(RuntimeError):
+        cache.wait("key", interval=0)
@@ -0,0 +1,162 @@
+from pathlib import Path
+from typing import List
+import pytest
+from omni.benchmarks import LocalJobExecutor
+from omni.utils.schemas import JobGraph, LocalConfig, RunConfig
+
+
+def get_run_config(
+    gpus: List[str], tensor_parallel_size: int = 1, cpu_workers: int = 4
+):
+    return RunConfig(
+        dtype="bfloat16",
+        tensor_parallel_size=tensor_parallel_size,
+        images_directory=Path("images"),
+        local=LocalConfig(concurrent=True, gpus=gpus, cpu_workers=cpu_workers),
+    )
+
+
+def get_events(log: Path) -> List[str]:
+    return log.read_text().split()
+
+
+def logged(log: Path, name: str, seconds: float = 0.2) -> str:
+    """
+    Get a command logging its start and its end, running for the given time.
+    """
+
+    return f"echo start-{name} >> {log} && sleep {seconds} && echo end-{name} >> {log}"
+
+
+def test_gpu_jobs_get_their_own_slot(tmp_path: Path):
+    graph = JobGraph(run_id="run", model="model")
+    for index in range(3):
+        graph.add(
+            f"echo $CUDA_VISIBLE_DEVICES > {tmp_path / f'gpus-{index}'} && sleep 0.2",
+            "gpu",
+        )
+
+    executor = LocalJobExecutor(
+        graph, get_run_config(["0", "1", "2", "3"], 2), interval=0.01
+    )
+    assert executor.run()
+
+    slots = [(tmp_path / f"gpus-{index}").read_text().strip() for index in range(3)]
+    assert slots[0] != slots[1]
+    assert set(slots) == {"0,1", "2,3"}
+    # All the slots are back in the pool
+    assert sorted(executor.free_slots) == [["0", "1"], ["2", "3"]]
+
+
+def test_gpu_jobs_wait_for_a_free_slot(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    graph.add(logged(log, "a"), "gpu")
+    graph.add(logged(log, "b"), "gpu")
+
+    assert LocalJobExecutor(graph, get_run_config(["0"]), interval=0.01).run()
+    assert get_events(log) == ["start-a", "end-a", "start-b", "end-b"]
+
+
+def test_cpu_jobs_are_limited_by_the_workers(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    for name in "abc":
+        graph.add(logged(log, name), "cpu")
+
+    executor = LocalJobExecutor(graph, get_run_config([], cpu_workers=2), interval=0.01)
+    assert executor.run()
+
+    running = 0
+    for event in get_events(log):
+        running += 1 if event.startswith("start") else -1
+        assert running <= 2
+    assert executor.free_workers == 2
+
+
+def test_cpu_and_gpu_jobs_run_side_by_side(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    graph.add(logged(log, "gpu", 0.5), "gpu")
+    graph.add(logged(log, "cpu", 0.5), "cpu")
+
+    assert LocalJobExecutor(
+        graph, get_run_config(["0"], cpu_workers=1), interval=0.01
+    ).run()
+    assert sorted(get_events(log)[:2]) == ["start-cpu", "start-gpu"]
+
+
+def test_jobs_wait_for_their_dependencies(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    first = graph.add(logged(log, "first"), "cpu")
+    second = graph.add(logged(log, "second"), "gpu", [first])
+    graph.add(logged(log, "third"), "cpu", [f"afterok:{second}"])
+
+    assert LocalJobExecutor(graph, get_run_config(["0"]), interval=0.01).run()
+    assert get_events(log) == [
+        "start-first",
+        "end-first",
+        "start-second",
+        "end-second",
+        "start-third",
+        "end-third",
+    ]
+
+
+def test_highest_priority_starts_first(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    graph.add(logged(log, "short", 0), "gpu")
+    graph.add(logged(log, "long", 0), "gpu")
+
+    assert LocalJobExecutor(
+        graph, get_run_config(["0"]), {"0": 1.0, "1": 10.0}, interval=0.01
+    ).run()
+    assert get_events(log) == ["start-long", "end-long", "start-short", "end-short"]
+
+
+def test_failures_propagate_to_the_dependent_jobs(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    failing = graph.add("exit 3", "gpu")
+    graph.add(logged(log, "skipped"), "cpu", [failing])
+    skipped = graph.add(logged(log, "skipped"), "cpu", [f"afterok:{failing}"])
+    graph.add(logged(log, "transitive"), "cpu", [skipped])
+    graph.add(logged(log, "cleanup", 0), "cpu", [f"afterany:{failing}"])
+
+    executor = LocalJobExecutor(graph, get_run_config(["0"]), interval=0.01)
+    assert not executor.run()
+
+    assert get_events(log) == ["start-cleanup", "end-cleanup"]
+    assert executor.state == {
+        "0": "failed",
+        "1": "failed",
+        "2": "failed",
+        "3": "failed",
+        "4": "done",
+    }
+    assert executor.free_slots == [["0"]]
+    assert executor.free_workers == 4
+
+
+def test_services_are_stopped_once_unused(tmp_path: Path):
+    log = tmp_path / "log"
+    graph = JobGraph(run_id="run", model="model")
+    server = graph.add("sleep 60", "gpu", service=True)
+    graph.add(logged(log, "client"), "cpu", [f"after:{server}"])
+
+    executor = LocalJobExecutor(graph, get_run_config(["0"]), interval=0.01)
+    assert executor.run()
+
+    assert get_events(log) == ["start-client", "end-client"]
+    assert executor.processes == {}
+    assert executor.free_slots == [["0"]]
+
+
+def test_gpu_jobs_need_a_full_slot():
+    graph = JobGraph(run_id="run", model="model")
+    graph.add("true", "gpu")
+
+    with pytest.raises(ValueError):
+        LocalJobExecutor(graph, get_run_config(["0"], 2))
@@ -0,0 +1,76 @@
+import pytest
+from omni.utils.schemas import JobGraph
+
+
+def get_graph() -> JobGraph:
+    """
+    Get a run of two tasks: a long GPU evaluation and a short one, each saved by a CPU job, then the export.
+    """
+
+    graph = JobGraph(run_id="run", model="model")
+    mkdir = graph.add("mkdir", "cpu", name="mkdir")
+    short = graph.add("short", "gpu", [mkdir], name="short/evaluate")
+    long = graph.add("long", "gpu", [mkdir], name="long/evaluate")
+    short_save = graph.add("save short", "cpu", [short], name="short/save")
+    long_save = graph.add("save long", "cpu", [f"afterok:{long}"], name="long/save")
+    graph.add("export", "cpu", [f"afterany:{short_save}", f"afterany:{long_save}"])
+
+    return graph
+
+
+DURATIONS = {"0": 1.0, "1": 10.0, "2": 100.0, "3": 5.0, "4": 5.0, "5": 1.0}
+
+
+def test_priorities_are_longest_paths_to_the_end():
+    priorities = get_graph().get_priorities(DURATIONS)
+
+    assert priorities == {
+        "5": 1.0,
+        "4": 6.0,
+        "3": 6.0,
+        "2": 106.0,
+        "1": 16.0,
+        "0": 107.0,
+    }
+
+
+def test_order_respects_dependencies_and_priorities():
+    graph = get_graph()
+    order = [job.id for job in graph.get_order(graph.get_priorities(DURATIONS))]
+
+    assert order == ["0", "2", "1", "3", "4", "5"]
+    for job in graph.jobs:
+        for dependency in job.dependencies:
+            assert order.index(dependency.rpartition(":")[2]) < order.index(job.id)
+
+
+def test_order_ignores_external_dependencies():
+    graph = JobGraph(run_id="run", model="model")
+    graph.add("restore", "cpu", ["12345"])
+
+    assert [job.id for job in graph.get_order({})] == ["0"]
+
+
+def test_makespan_without_limits_is_the_critical_path():
+    assert get_graph().estimate_makespan(DURATIONS) == 107.0
+
+
+def test_makespan_with_one_gpu_slot_serializes_the_evaluations():
+    # The long evaluation starts first, the short one and its save run after it
+    assert get_graph().estimate_makespan(DURATIONS, gpu_slots=1) == 117.0
+
+
+def test_makespan_counts_services_as_free():
+    graph = JobGraph(run_id="run", model="model")
+    server = graph.add("serve", "gpu", name="server", service=True)
+    graph.add("client", "cpu", [server], name="client")
+
+    assert graph.estimate_makespan({"0": 1000.0, "1": 10.0}, gpu_slots=0) == 10.0
+
+
+def test_makespan_rejects_unsatisfiable_dependencies():
+    graph = JobGraph(run_id="run", model="model")
+    graph.add("gpu job", "gpu")
+
+    with pytest.raises(ValueError):
+        graph.estimate_makespan({"0": 1.0}, gpu_slots=0)
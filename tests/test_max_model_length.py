@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+from typing import Any
+from omni.utils.functions import get_max_model_length
+
+
+def make_model(path: Path, config: dict[str, Any]) -> str:
+    path.mkdir(parents=True)
+    with open(path / "config.json", "w") as file:
+        json.dump(config, file)
+
+    return str(path)
+
+
+def test_length_is_the_smallest_length_given(tmp_path: Path):
+    model = make_model(
+        tmp_path / "model", {"max_position_embeddings": 8192, "seq_length": 4096}
+    )
+
+    assert get_max_model_length(model) == 4096
+
+
+def test_length_is_extended_by_the_rope_scaling(tmp_path: Path):
+    model = make_model(
+        tmp_path / "model",
+        {
+            "max_position_embeddings": 32768,
+            "rope_scaling": {"rope_type": "yarn", "factor": 4.0},
+        },
+    )
+
+    assert get_max_model_length(model) == 131072
+
+
+def test_length_already_extended_is_kept(tmp_path: Path):
+    model = make_model(
+        tmp_path / "model",
+        {
+            "max_position_embeddings": 131072,
+            "rope_scaling": {"rope_type": "llama3", "factor": 8.0},
+        },
+    )
+
+    assert get_max_model_length(model) == 131072
+
+
+def test_length_of_a_multimodal_model_is_the_one_of_its_language_model(
+    tmp_path: Path,
+):
+    model = make_model(
+        tmp_path / "model",
+        {
+            "vision_config": {"max_position_embeddings": 1024},
+            "text_config": {"max_position_embeddings": 8192},
+        },
+    )
+
+    assert get_max_model_length(model) == 8192
+
+
+def test_length_is_unknown_without_configuration(tmp_path: Path):
+    (tmp_path / "model").mkdir()
+
+    assert get_max_model_length(str(tmp_path / "model")) is None
+    assert get_max_model_length(make_model(tmp_path / "empty", {})) is None
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+import pytest
+from omni.benchmarks import SamplePool
+from omni.services import put_generations, take_generations
+
+
+def get_generations(n_problems: int, n_samples: int, seed: int) -> list:
+    return [
+        [f"{problem}-{seed}-{sample}" for sample in range(n_samples)]
+        for problem in range(n_problems)
+    ]
+
+
+def write_generations(path: Path, generations: list) -> Path:
+    with open(path, "w") as file:
+        json.dump(generations, file)
+
+    return path
+
+
+def test_add_continues_the_pool_from_the_seed(tmp_path: Path):
+    pool = SamplePool("pool", tmp_path)
+    pool.add(({"task_id": 0, "generation": f"0-0-{i}"} for i in range(5)), 0)
+
+    assert (
+        pool.add(({"task_id": 0, "generation": f"0-5-{i}"} for i in range(15)), 5) == 15
+    )
+    assert pool.get_size() == 20
+
+
+def test_add_skips_the_positions_held_by_a_larger_pool(tmp_path: Path):
+    pool = SamplePool("pool", tmp_path)
+    pool.add(({"task_id": 0, "generation": f"0-0-{i}"} for i in range(10)), 0)
+
+    # Topped up from a smaller pool of the same batch, with the seed of its size
+    new = [{"task_id": 0, "generation": f"0-5-{i}"} for i in range(15)]
+    assert pool.add(new, 5) == 10
+    assert pool.get_size() == 20
+    assert [record["generation"] for record in pool.read(20)][10:] == [
+        f"0-5-{i}" for i in range(5, 15)
+    ]
+
+
+def test_generations_are_taken_back_in_the_order_of_the_problems(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    small = write_generations(tmp_path / "small.json", get_generations(3, 2, 0))
+    large = write_generations(tmp_path / "large.json", get_generations(3, 4, 0))
+    put_generations("small", small, 0)
+    put_generations("large", large, 0)
+
+    new = write_generations(tmp_path / "new.json", get_generations(3, 4, 2))
+    put_generations("small", new, 2)
+    put_generations("large", new, 2)
+
+    for key, expected in (
+        ("small", ["0-0-0", "0-0-1", "0-2-0", "0-2-1", "0-2-2", "0-2-3"]),
+        ("large", ["0-0-0", "0-0-1", "0-0-2", "0-0-3", "0-2-2", "0-2-3"]),
+    ):
+        take_generations(key, 6, tmp_path / f"{key}_taken.json")
+        with open(tmp_path / f"{key}_taken.json", "r") as file:
+            taken = json.load(file)
+
+        assert len(taken) == 3
+        assert taken[0] == expected
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+from omni.benchmarks import ResultIndex, ResultStore
+
+
+def test_store_loads_the_results_per_task(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "humaneval", {"pass@1": 0.5, "temperature": 0.2})
+    store.append("model", "humaneval", {"pass@1": 0.6, "temperature": 0.8})
+    store.append("model", "mbpp", {"pass@1": 0.4})
+
+    assert store.load() == {
+        "model": "model",
+        "humaneval": [
+            {"pass@1": 0.5, "temperature": 0.2},
+            {"pass@1": 0.6, "temperature": 0.8},
+        ],
+        "mbpp": [{"pass@1": 0.4}],
+    }
+
+
+def test_store_skips_a_record_cut_short(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "mbpp", {"pass@1": 0.4})
+    with open(store.log, "a") as file:
+        file.write('{"model": "model", "task": "humaneval"')
+
+    assert store.load() == {"model": "model", "mbpp": [{"pass@1": 0.4}]}
+
+
+def test_store_exports_the_per_run_file(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "mbpp", {"pass@1": 0.4})
+
+    with open(store.export(), "r") as file:
+        assert json.load(file) == store.load()
+
+
+def test_index_only_reads_the_new_records(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "mbpp", {"pass@1": 0.4, "n_samples": 5})
+    index = ResultIndex(tmp_path)
+    index.update()
+
+    store.append("model", "humaneval", {"pass@1": 0.5, "pass@1_stderr": 0.1})
+    index.update()
+    index.update()
+
+    rows = index.query()
+    assert sorted((row["task"], row["metric"], row["value"]) for row in rows) == [
+        ("humaneval", "pass@1", 0.5),
+        ("humaneval", "pass@1_stderr", 0.1),
+        ("mbpp", "pass@1", 0.4),
+    ]
+    assert next(row for row in rows if row["task"] == "mbpp")["n_samples"] == "5"
+
+
+def test_index_skips_the_per_run_file_of_a_log(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "mbpp", {"pass@1": 0.4})
+    store.export()
+    with open(tmp_path / "older.json", "w") as file:
+        json.dump({"model": "other", "mbpp": [{"pass@1": 0.3}]}, file)
+
+    index = ResultIndex(tmp_path)
+    index.update()
+
+    assert sorted((row["run_id"], row["value"]) for row in index.query()) == [
+        ("older", 0.3),
+        ("run", 0.4),
+    ]
+
+
+def test_index_drops_the_results_of_removed_files(tmp_path: Path):
+    store = ResultStore("run", tmp_path)
+    store.append("model", "mbpp", {"pass@1": 0.4})
+    index = ResultIndex(tmp_path)
+    index.update()
+
+    store.log.unlink()
+    index.update()
+
+    assert index.query() == []
+
+
+def test_index_query_filters_with_wildcards(tmp_path: Path):
+    ResultStore("first", tmp_path).append("org/a", "mbpp", {"pass@1": 0.4})
+    ResultStore("second", tmp_path).append("org/b", "humaneval", {"pass@1": 0.5})
+    index = ResultIndex(tmp_path)
+    index.update()
+
+    assert [row["run_id"] for row in index.query(models=["*/b"])] == ["second"]
+    assert [row["model"] for row in index.query(tasks=["mb*"])] == ["org/a"]
+    assert index.query(models=["org/a"], tasks=["humaneval"]) == []
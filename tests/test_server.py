@@ -0,0 +1,138 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterator
+import pytest
+from omni import services
+from omni.benchmarks import InferenceServer
+from omni.utils.functions import wait_for_server
+from omni.utils.schemas import RunConfig, ServerConfig
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Stub of an inference server, healthy once `healthy` is set.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.healthy = False
+        self.checks = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.server.checks += 1
+        self.send_response(
+            200 if self.path == "/health" and self.server.healthy else 503
+        )
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub() -> Iterator[StubServer]:
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def run_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # The url of the server is written relative to the working directory of the run
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def get_server(startup_timeout: int = 5) -> InferenceServer:
+    run_config = RunConfig(
+        dtype="bfloat16",
+        tensor_parallel_size=1,
+        images_directory=Path("images"),
+        server=ServerConfig(startup_timeout=startup_timeout),
+    )
+
+    return InferenceServer("run", run_config, None)
+
+
+def write_url(url: str) -> None:
+    path = Path("results/temp/run/server.url")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{url}\n")
+
+
+def test_wait_for_server_returns_once_healthy(stub: StubServer):
+    threading.Timer(0.3, lambda: setattr(stub, "healthy", True)).start()
+
+    wait_for_server(stub.url, 5, interval=0.05)
+
+    assert stub.healthy
+    assert stub.checks > 1
+
+
+def test_wait_for_server_times_out(stub: StubServer):
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutError):
+        wait_for_server(stub.url, 0.5, interval=0.05)
+
+    assert time.monotonic() - start < 5
+
+
+def test_wait_for_server_fails_when_the_server_exits(stub: StubServer):
+    process = subprocess.Popen([sys.executable, "-c", "raise SystemExit(1)"])
+    process.wait()
+
+    with pytest.raises(RuntimeError):
+        wait_for_server(stub.url, 5, process=process, interval=0.05)
+
+
+def test_wait_reads_the_url_written_by_the_server_job(stub: StubServer, run_dir: Path):
+    stub.healthy = True
+    threading.Timer(0.3, write_url, (stub.url,)).start()
+
+    get_server().wait(interval=0.05)
+
+    assert stub.checks == 1
+
+
+def test_wait_fails_after_the_startup_timeout(stub: StubServer, run_dir: Path):
+    write_url(stub.url)
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutError):
+        get_server(startup_timeout=1).wait(interval=0.05)
+
+    assert 1 <= time.monotonic() - start < 5
+    assert stub.checks > 1
+
+
+def test_wait_fails_when_the_server_job_never_starts(run_dir: Path):
+    with pytest.raises(TimeoutError):
+        get_server(startup_timeout=1).wait(interval=0.05)
+
+
+def test_wait_server_command_returns_once_healthy(stub: StubServer, run_dir: Path):
+    stub.healthy = True
+    write_url(stub.url)
+
+    services.wait_server("run", get_server().run_config)
+
+    assert stub.checks == 1
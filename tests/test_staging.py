@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import pytest
+from omni.benchmarks import NodeCache
+
+
+def make_source(path: Path, size: int) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"0" * size)
+    return path
+
+
+def test_stage_copies_a_file_once(tmp_path: Path):
+    source = make_source(tmp_path / "shared" / "image.sif", 10)
+    cache = NodeCache(tmp_path / "node")
+
+    copy = cache.stage(source, "image-abc")
+    assert copy == tmp_path / "node" / "image-abc.sif"
+    assert copy.read_bytes() == source.read_bytes()
+
+    # The copy is reused, even once the source changed under the same key
+    source.write_bytes(b"1" * 10)
+    assert cache.stage(source, "image-abc").read_bytes() == b"0" * 10
+
+
+def test_stage_copies_a_folder(tmp_path: Path):
+    source = tmp_path / "shared" / "model"
+    make_source(source / "config.json", 2)
+    make_source(source / "weights" / "model.safetensors", 10)
+
+    copy = NodeCache(tmp_path / "node").stage(source, "model-abc")
+
+    assert (copy / "weights" / "model.safetensors").stat().st_size == 10
+
+
+def test_stage_rejects_a_copy_not_matching_its_source(tmp_path: Path):
+    source = make_source(tmp_path / "shared" / "image.sif", 10)
+    cache = NodeCache(tmp_path / "node")
+
+    with pytest.raises(ValueError):
+        cache.stage(source, "image-abc", verify=lambda copy: False)
+
+    assert not any(
+        path.suffix in (".sif", ".tmp") for path in cache.directory.iterdir()
+    )
+
+
+def test_stage_rejects_a_copy_larger_than_the_cache(tmp_path: Path):
+    source = make_source(tmp_path / "shared" / "image.sif", 10)
+
+    with pytest.raises(ValueError):
+        NodeCache(tmp_path / "node", max_size=5).stage(source, "image-abc")
+
+
+def test_stage_evicts_the_least_recently_used_copies(tmp_path: Path):
+    cache = NodeCache(tmp_path / "node", max_size=25)
+    first = cache.stage(make_source(tmp_path / "shared" / "a.bin", 10), "a")
+    second = cache.stage(make_source(tmp_path / "shared" / "b.bin", 10), "b")
+    os.utime(first, (0, 0))
+
+    third = cache.stage(make_source(tmp_path / "shared" / "c.bin", 10), "c")
+
+    assert not first.exists()
+    assert second.exists() and third.exists()
+
+
+def test_stage_keeps_the_copies_in_use(tmp_path: Path):
+    cache = NodeCache(tmp_path / "node", max_size=15)
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        used = cache.stage(
+            make_source(tmp_path / "shared" / "a.bin", 10), "a", user=process.pid
+        )
+
+        # The cache stays over its size while the copy is used
+        cache.stage(make_source(tmp_path / "shared" / "b.bin", 10), "b")
+        assert used.exists()
+    finally:
+        process.kill()
+        process.wait()
+
+    cache.stage(make_source(tmp_path / "shared" / "c.bin", 10), "c")
+    assert not used.exists()
+    assert not used.with_name(f"{used.name}.users").exists()
+
+
+def test_is_used_forgets_ended_processes(tmp_path: Path):
+    cache = NodeCache(tmp_path / "node")
+    copy = cache.stage(make_source(tmp_path / "shared" / "a.bin", 10), "a")
+
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    cache.add_user(copy, os.getpid())
+    cache.add_user(copy, process.pid)
+
+    assert cache.is_used(copy)
+    assert [user.name for user in copy.with_name("a.bin.users").iterdir()] == [
+        str(os.getpid())
+    ]